@@ -48,4 +48,20 @@ class NotGrayscaleImageError(Exception):
     """
     def __init__(self):
         Error_msg = "This error indicates the array passed is not a grayscale image as expected by the function"
-        super().__init__(self, Error_msg)
\ No newline at end of file
+        super().__init__(self, Error_msg)
+
+class ImageSequenceError(Exception):
+    """ImageSequenceError
+
+    Raised when reading or writing a list of images fails for some files.
+
+    Parameters
+    ----------
+    errors : list
+        (index, filename, message) for each file that failed, in file order
+    """
+    def __init__(self, errors):
+        self.errors = errors
+        Error_msg = "Failed on {} file(s):\n".format(len(errors)) + "\n".join(
+            "{}: {} - {}".format(index, filename, message) for index, filename, message in errors)
+        super().__init__(self, Error_msg)
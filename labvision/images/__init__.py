@@ -8,3 +8,7 @@ from .feature_detection import *
 from .blurs import *
 from .contours import *
 from .morphological import *
+from .feature_table import *
+from .sweep import *
+from .difference import *
+from .packing import *
@@ -1,20 +1,27 @@
+import os
 import cv2
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
 from qtwidgets.config import get_monitor_size
 from labvision.images.geometric import get_shape
 import datetime
+import threading
+import time
 
-from labvision.custom_exceptions import NotImageError
+from labvision.custom_exceptions import NotImageError, ImageSequenceError
 
 __all__ = [
     'display',
     'Displayer',
+    'LiveDisplayer',
     'read_img',
     'load',
     'read',
     'write_img',
     'save',
-    'write'
+    'write',
+    'read_imgs',
+    'write_imgs'
 ]
 
 def setupWindow(image,title=''):
@@ -36,6 +43,7 @@ def setupWindow(image,title=''):
     cv2.namedWindow(title, cv2.WINDOW_NORMAL)#, cv2.WINDOW_KEEPRATIO)
     cv2.resizeWindow(title, int(scale*img_shape[1]), int(scale*img_shape[0]))
     cv2.moveWindow(title, int(0.125*w), int(0.075*h))
+    return int(scale*img_shape[1]), int(scale*img_shape[0])
     
 
 Pt = tuple[int, int]
@@ -104,6 +112,117 @@ class Displayer:
             print('Window already closed')
 
 
+def _fit_to_window(img, window_size):
+    """Shrink img to fit inside window_size (w, h) keeping its aspect ratio.
+    Images that already fit are returned unchanged."""
+    win_w, win_h = window_size
+    h, w = img.shape[:2]
+    scale = min(win_w / w, win_h / h)
+    if scale >= 1:
+        return img
+    size = (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1))
+    return cv2.resize(img, size, interpolation=cv2.INTER_AREA)
+
+
+class _LatestFrame:
+    """Holds only the most recent frame passed to LiveDisplayer.update_im
+
+    put never blocks. take returns the newest frame once, shrunk to fit
+    the window, and None if nothing new has arrived. Any frames put in
+    between are dropped.
+    """
+
+    def __init__(self, img):
+        self.num_produced = 0
+        self.num_displayed = 0
+        self._img = img
+        self._new = threading.Event()
+        self._new.set()
+
+    def put(self, img):
+        self.num_produced += 1
+        self._img = img
+        self._new.set()
+
+    def take(self, window_size=None):
+        if not self._new.is_set():
+            return None
+        self._new.clear()
+        img = self._img
+        if window_size is not None:
+            img = _fit_to_window(img, window_size)
+        self.num_displayed += 1
+        return img
+
+
+class LiveDisplayer:
+
+    def __init__(self, img: np.ndarray, title: str='', poll_ms: int=1):
+        """A non blocking OpenCV window for live previews.
+
+        The window is drawn by its own thread. update_im just stores the
+        frame and returns, so the processing loop is never held up. If
+        frames arrive faster than they can be drawn the stale ones are
+        dropped and only the most recent is shown. Frames larger than the
+        window are shrunk to fit, keeping their aspect ratio, before imshow.
+
+        Same interface as Displayer. Press q in the window to close it.
+        Some platforms (e.g macOS) only allow windows on the main thread.
+
+        Parameters
+        ----------
+        img : np.ndarray
+            initial image to initialise with
+        title : str, optional
+            name of the window.
+        poll_ms : int, optional
+            ms passed to cv2.waitKey between draws
+        """
+        self.active = True
+        self.window_name = title
+        self.poll_ms = poll_ms
+        self._t_start = time.time()
+        self._frames = _LatestFrame(img)
+        self._first = img
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    @property
+    def num_produced(self):
+        return self._frames.num_produced
+
+    @property
+    def num_displayed(self):
+        return self._frames.num_displayed
+
+    def update_im(self, img):
+        """Hand a new frame to the display thread. Never blocks."""
+        self._frames.put(img)
+
+    def _run(self):
+        window_size = setupWindow(self._first, title=self.window_name)
+        while self.active:
+            img = self._frames.take(window_size)
+            if img is not None:
+                cv2.imshow(self.window_name, img)
+            if cv2.waitKey(self.poll_ms) & 0xFF == ord('q'):
+                self.active = False
+        try:
+            cv2.destroyWindow(self.window_name)
+        except:
+            print('Window already closed')
+
+    def fps(self):
+        """Returns (produced fps, displayed fps) since the window opened"""
+        elapsed = max(time.time() - self._t_start, 1e-9)
+        return self.num_produced / elapsed, self.num_displayed / elapsed
+
+    def close_window(self):
+        self.active = False
+        if self._thread is not threading.current_thread():
+            self._thread.join()
+
+
 def read_img(filepath, grayscale=False, alpha=False):
     """
     Reads an image from a filepath.
@@ -128,14 +247,7 @@ def read_img(filepath, grayscale=False, alpha=False):
         Color images will have channels stored in BGR order
 
     """
-    assert grayscale * alpha == 0, 'Only one of alpha and grayscale can be True'
-    if grayscale:
-        flag = 0
-    elif alpha:
-        flag = -1
-    else:
-        flag = 1
-    img = cv2.imread(filepath, flag)
+    img = cv2.imread(filepath, _imread_flag(grayscale, alpha))
     return img
 
 
@@ -184,4 +296,119 @@ save = write_img
 write = write_img
 
 
+def _imread_flag(grayscale, alpha):
+    assert grayscale * alpha == 0, 'Only one of alpha and grayscale can be True'
+    if grayscale:
+        return 0
+    elif alpha:
+        return -1
+    return 1
+
+
+def read_imgs(filepaths, grayscale=False, alpha=False, workers=None, out=None):
+    """
+    Reads a list of images into a single stack using a pool of threads.
+
+    All images must be the same size. The first image is read to find the
+    size of the stack unless out is supplied.
 
+    Parameters
+    ----------
+    filepaths: list of image filepaths
+
+    grayscale, alpha: as for read_img
+
+    workers: number of threads. None uses one per cpu.
+
+    out: optional preallocated array of shape (N,H,W) or (N,H,W,C) to read into
+
+    Returns
+    -------
+    out: stack of images
+
+    Raises
+    ------
+    ImageSequenceError listing, in order, every file that couldn't be read
+    or was the wrong size. The other images are still read into out.
+    """
+    filepaths = list(filepaths)
+    flag = _imread_flag(grayscale, alpha)
+    if out is None:
+        first = cv2.imread(filepaths[0], flag)
+        if first is None:
+            raise ImageSequenceError([(0, filepaths[0], 'could not read image')])
+        out = np.empty((len(filepaths),) + np.shape(first), dtype=first.dtype)
+    assert len(out) == len(filepaths), 'out must have one frame per file'
+
+    def read_one(i):
+        img = cv2.imread(filepaths[i], flag)
+        if img is None:
+            return (i, filepaths[i], 'could not read image')
+        if np.shape(img) != np.shape(out[i]):
+            return (i, filepaths[i], 'shape {} does not match {}'.format(np.shape(img), np.shape(out[i])))
+        out[i] = img
+        return None
+
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(read_one, range(len(filepaths))))
+    errors = [result for result in results if result is not None]
+    if errors:
+        raise ImageSequenceError(errors)
+    return out
+
+
+def write_imgs(imgs, pattern : str, workers=None, params=None, png_compression=None, jpeg_quality=None, start=0):
+    """
+    Writes a stack or list of images to files using a pool of threads.
+
+    Example
+    -------
+    write_imgs(stack, '/path/frame_{:05d}.png', png_compression=1)
+
+    Parameters
+    ----------
+    imgs: (N,H,W) or (N,H,W,C) stack or list of images
+
+    pattern: filename containing a format field for the image number
+        e.g 'frame_{:05d}.png'. The format is chosen from the extension.
+
+    workers: number of threads. None uses one per cpu.
+
+    params: list of cv2.imwrite parameters e.g [cv2.IMWRITE_PNG_COMPRESSION, 1]
+
+    png_compression: 0-9. Lower is faster and bigger. Added to params.
+
+    jpeg_quality: 0-100. Added to params.
+
+    start: number of the first image
+
+    Returns
+    -------
+    filenames: list of files written, in order
+
+    Raises
+    ------
+    ImageSequenceError listing, in order, every image that couldn't be written.
+    """
+    params = list(params) if params is not None else []
+    if png_compression is not None:
+        params += [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+    if jpeg_quality is not None:
+        params += [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+    filenames = [pattern.format(start + i) for i in range(len(imgs))]
+
+    def write_one(i):
+        try:
+            ret = cv2.imwrite(filenames[i], imgs[i], params)
+        except cv2.error as e:
+            return (i, filenames[i], str(e).strip())
+        if not ret:
+            return (i, filenames[i], 'could not write image')
+        return None
+
+    with ThreadPoolExecutor(workers) as pool:
+        results = list(pool.map(write_one, range(len(imgs))))
+    errors = [result for result in results if result is not None]
+    if errors:
+        raise ImageSequenceError(errors)
+    return filenames
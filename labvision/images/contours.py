@@ -2,22 +2,33 @@ import cv2
 import numpy as np
 from scipy import optimize as op
 from math import pi, cos, sin
+from concurrent.futures import ProcessPoolExecutor
 
 __all__ = [
     "find_contours",
     "contour_to_xy",
+    "PackedContours",
     "center_of_mass",
     "contour_props",
+    "contours_props",
     "bounding_rectangle",
     "rotated_bounding_rectangle",
     "sort_contours",
+    "contour_areas",
+    "select_contours",
     "cut_out_object",
+    "cut_out_objects",
+    "polygon",
+    "polygon_dist",
+    "fit_polygon",
+    "fit_polygons",
+    "find_contours_corners",
     "find_contour_corners",
     "fit_hex"
 ]
 
 
-def find_contours(img : np.ndarray, hierarchy : bool=False):
+def find_contours(img : np.ndarray, hierarchy : bool=False, min_area=None, max_area=None, top_k=None):
     """find_contours finds the contours in a binary image
 
     Parameters
@@ -27,6 +38,9 @@ def find_contours(img : np.ndarray, hierarchy : bool=False):
     hierarchy : bool, optional
         An object that allows you to explore the nestedness of contours.
         see https://docs.opencv.org/4.x/d9/d8b/tutorial_py_contours_hierarchy.html
+    min_area, max_area, top_k : optional
+        filter the contours straight away with select_contours. Can't be
+        used with hierarchy as the hierarchy indices refer to all contours.
 
     Returns
     -------
@@ -42,6 +56,10 @@ def find_contours(img : np.ndarray, hierarchy : bool=False):
     
     contours, hier = cv2.findContours(
             img, cv2.RETR_TREE, cv2.CHAIN_APPROX_SIMPLE)
+
+    if (min_area is not None) or (max_area is not None) or (top_k is not None):
+        assert not hierarchy, 'Cannot filter contours and return hierarchy'
+        contours = select_contours(contours, top_k=top_k, min_area=min_area, max_area=max_area)
     
     if hierarchy:
         return contours, hier
@@ -51,13 +69,88 @@ def find_contours(img : np.ndarray, hierarchy : bool=False):
 def contour_to_xy(contour):
     """Converts a contour to an x and y array of points
      useful for plotting """
-    x = np.array([pt[0][0] for pt in contour])
-    y = np.array([pt[0][1] for pt in contour])
-    return x,y
+    pts = np.reshape(contour, (-1, 2))
+    return pts[:, 0].copy(), pts[:, 1].copy()
+
+
+class PackedContours:
+    """All the contours in a frame packed into one array
+
+    Rather than a list of separate (n,1,2) arrays the points of every
+    contour are concatenated into a single (P,2) array. Contour i is
+    points[offsets[i]:offsets[i+1]]. Indexing returns a view in the
+    usual (n,1,2) contour format so existing functions still work.
+
+    Attributes
+    ----------
+    points : np.ndarray
+        (P,2) int32 array of x, y for every point
+    offsets : np.ndarray
+        (N+1,) int64 start of each contour in points, plus the total
+
+    Examples
+    --------
+    | packed = PackedContours(find_contours(bw_img))
+    | x, y = packed.xy(3)
+    | img = draw_contours(img, packed)
+    | np.savez('contours.npz', points=packed.points, offsets=packed.offsets)
+
+    """
+
+    def __init__(self, contours=None, points=None, offsets=None):
+        if contours is not None:
+            lengths = np.fromiter((len(c) for c in contours), dtype=np.int64, count=len(contours))
+            self.offsets = np.zeros(len(contours) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=self.offsets[1:])
+            if len(contours):
+                self.points = np.concatenate([np.reshape(c, (-1, 2)) for c in contours]).astype(np.int32, copy=False)
+            else:
+                self.points = np.zeros((0, 2), dtype=np.int32)
+        else:
+            self.points = np.asarray(points, dtype=np.int32).reshape(-1, 2)
+            self.offsets = np.asarray(offsets, dtype=np.int64)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        """Contour i as an (n,1,2) view"""
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError('contour index out of range')
+        return self.points[self.offsets[i]:self.offsets[i + 1]].reshape(-1, 1, 2)
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    @property
+    def lengths(self):
+        """Number of points in each contour"""
+        return np.diff(self.offsets)
+
+    @property
+    def labels(self):
+        """(P,) index of the contour each point belongs to"""
+        return np.repeat(np.arange(len(self)), self.lengths)
+
+    def xy(self, i):
+        """x and y arrays of contour i, as contour_to_xy"""
+        pts = self.points[self.offsets[i]:self.offsets[i + 1]]
+        return pts[:, 0], pts[:, 1]
+
+    def to_list(self):
+        """List of (n,1,2) views, the format returned by find_contours"""
+        return [self[i] for i in range(len(self))]
 
 def center_of_mass(contour):
-    """Find the centre of mass of a contour"""
+    """Find the centre of mass of a contour. If the contour has zero area
+    (e.g a line or single point) the mean of its points is used."""
     moments = cv2.moments(contour)
+    if moments['m00'] == 0:
+        cx, cy = np.mean(np.reshape(contour, (-1, 2)), axis=0)
+        return int(cx), int(cy)
     cx = int(moments['m10'] / moments['m00'])
     cy = int(moments['m01'] / moments['m00'])
     return cx, cy
@@ -70,6 +163,110 @@ def contour_props(contour, closed=True):
     Area = cv2.contourArea(contour)
     return (cx,cy),Perim,Area
 
+def _shoelace(packed):
+    """Points, next point round each contour and their cross product
+
+    Summing cross over each contour with np.add.reduceat gives twice the
+    signed area. Shared by contours_props and contour_areas.
+    """
+    assert np.all(packed.lengths > 0), 'Contours must contain at least one point'
+    starts = packed.offsets[:-1]
+    pts = packed.points.astype(np.float64)
+    x, y = pts[:, 0], pts[:, 1]
+    # index of the next point round each contour
+    nxt = np.arange(1, len(pts) + 1)
+    nxt[packed.offsets[1:] - 1] = starts
+    x1, y1 = x[nxt], y[nxt]
+    return x, y, x1, y1, x * y1 - x1 * y
+
+
+CONTOUR_PROPS_DTYPE = np.dtype([
+    ('cx', np.float64), ('cy', np.float64),
+    ('area', np.float64), ('perimeter', np.float64),
+    ('x', np.int32), ('y', np.int32), ('w', np.int32), ('h', np.int32),
+    ('rect_cx', np.float32), ('rect_cy', np.float32),
+    ('rect_w', np.float32), ('rect_h', np.float32), ('rect_angle', np.float32),
+])
+
+
+def contours_props(contours=None, closed=True, rotated=True, bw_img=None, connectivity=8):
+    """Properties of every contour in a frame in one call
+
+    Centroid, area, perimeter and bounding box are calculated for all
+    contours at once with numpy rather than a python loop of cv2 calls.
+    The centroid and area use the same polygon moments as cv2.moments and
+    cv2.contourArea. Zero area contours get the mean of their points as
+    centroid instead of raising an error.
+
+    Parameters
+    ----------
+    contours : list of contours from find_contours or a PackedContours
+    closed : assume contours are closed when measuring perimeter
+    rotated : also find the minimum area rotated rectangle. This needs a
+        cv2.minAreaRect call per contour so set False if not needed.
+    bw_img : instead of contours pass a binary image. Properties then
+        come from cv2.connectedComponentsWithStats which is faster when
+        the contour hierarchy isn't needed. Area is then a pixel count and
+        perimeter and rotated rectangle fields are nan.
+    connectivity : 4 or 8, used with bw_img
+
+    Returns
+    -------
+    props : structured array with one row per contour and fields
+        cx, cy, area, perimeter, x, y, w, h (bounding_rectangle) and
+        rect_cx, rect_cy, rect_w, rect_h, rect_angle (cv2.minAreaRect)
+    """
+    if bw_img is not None:
+        _, _, stats, centroids = cv2.connectedComponentsWithStats(bw_img, connectivity=connectivity)
+        props = np.zeros(len(stats) - 1, dtype=CONTOUR_PROPS_DTYPE)
+        for name in ('perimeter', 'rect_cx', 'rect_cy', 'rect_w', 'rect_h', 'rect_angle'):
+            props[name] = np.nan
+        props['cx'], props['cy'] = centroids[1:, 0], centroids[1:, 1]
+        props['x'], props['y'] = stats[1:, cv2.CC_STAT_LEFT], stats[1:, cv2.CC_STAT_TOP]
+        props['w'], props['h'] = stats[1:, cv2.CC_STAT_WIDTH], stats[1:, cv2.CC_STAT_HEIGHT]
+        props['area'] = stats[1:, cv2.CC_STAT_AREA]
+        return props
+
+    packed = contours if isinstance(contours, PackedContours) else PackedContours(contours)
+    props = np.zeros(len(packed), dtype=CONTOUR_PROPS_DTYPE)
+    if len(packed) == 0:
+        return props
+
+    starts = packed.offsets[:-1]
+    ends = packed.offsets[1:]
+    x, y, x1, y1, cross = _shoelace(packed)
+    signed_area = 0.5 * np.add.reduceat(cross, starts)
+    m10 = np.add.reduceat((x + x1) * cross, starts) / 6
+    m01 = np.add.reduceat((y + y1) * cross, starts) / 6
+    lengths = packed.lengths
+    zero = signed_area == 0
+    safe_area = np.where(zero, 1, signed_area)
+    props['cx'] = np.where(zero, np.add.reduceat(x, starts) / lengths, m10 / safe_area)
+    props['cy'] = np.where(zero, np.add.reduceat(y, starts) / lengths, m01 / safe_area)
+    props['area'] = np.abs(signed_area)
+
+    segments = np.hypot(x1 - x, y1 - y)
+    if not closed:
+        segments[ends - 1] = 0
+    props['perimeter'] = np.add.reduceat(segments, starts)
+
+    ix, iy = packed.points[:, 0], packed.points[:, 1]
+    props['x'] = np.minimum.reduceat(ix, starts)
+    props['y'] = np.minimum.reduceat(iy, starts)
+    props['w'] = np.maximum.reduceat(ix, starts) - props['x'] + 1
+    props['h'] = np.maximum.reduceat(iy, starts) - props['y'] + 1
+
+    if rotated:
+        rects = np.array([(r[0][0], r[0][1], r[1][0], r[1][1], r[2])
+                          for r in map(cv2.minAreaRect, packed)], dtype=np.float32)
+        for i, name in enumerate(('rect_cx', 'rect_cy', 'rect_w', 'rect_h', 'rect_angle')):
+            props[name] = rects[:, i]
+    else:
+        for name in ('rect_cx', 'rect_cy', 'rect_w', 'rect_h', 'rect_angle'):
+            props[name] = np.nan
+    return props
+
+
 def bounding_rectangle(contour):
     """Rectangle bounding a contour which has length and width aligned with cartesian axes"""
     x, y, w, h = cv2.boundingRect(contour)
@@ -99,14 +296,78 @@ def sort_contours(cnts):
     cnts_new: list
         List of input contours sorted by area.
     """
-    area = []
-    for cnt in cnts:
-        area.append(cv2.contourArea(cnt))
-    sorted = np.argsort(area)
-    cnts_new = []
-    for arg in sorted:
-        cnts_new.append(cnts[arg])
-    return cnts_new
+    return [cnts[arg] for arg in np.argsort(contour_areas(cnts), kind='stable')]
+
+
+def contour_areas(contours):
+    """Area of every contour, same as cv2.contourArea, calculated in one go
+
+    Parameters
+    ----------
+    contours : list of contours or PackedContours
+
+    Returns
+    -------
+    (N,) float64 array of areas
+    """
+    packed = contours if isinstance(contours, PackedContours) else PackedContours(contours)
+    if len(packed) == 0:
+        return np.zeros(0)
+    cross = _shoelace(packed)[4]
+    return 0.5 * np.abs(np.add.reduceat(cross, packed.offsets[:-1]))
+
+
+def select_contours(contours, top_k=None, min_area=None, max_area=None, by='area', smallest=False, return_index=False):
+    """Select contours by area or another property without sorting them all
+
+    Parameters
+    ----------
+    contours : list of contours or PackedContours
+    top_k : int, optional
+        keep only the k largest (or smallest) by the selected property.
+        Uses np.argpartition so only those k are sorted.
+    min_area, max_area : optional
+        keep contours with min_area <= area <= max_area. Applied before top_k
+    by : str or array
+        'area' or any field of contours_props e.g 'perimeter', 'w'. Can
+        also be an array with one value per contour.
+    smallest : bool
+        top_k picks the smallest values instead of the largest
+    return_index : bool
+        also return the indices of the selected contours
+
+    Returns
+    -------
+    list of contours. With top_k they are ordered by the property (largest
+    first unless smallest) otherwise in their original order.
+    """
+    if isinstance(by, str) and by != 'area':
+        values = contours_props(contours, rotated=by.startswith('rect'))[by]
+        areas = contour_areas(contours) if (min_area is not None or max_area is not None) else None
+    else:
+        areas = contour_areas(contours)
+        values = areas if isinstance(by, str) else np.asarray(by)
+
+    index = np.arange(len(values))
+    keep = np.ones(len(values), dtype=bool)
+    if min_area is not None:
+        keep &= areas >= min_area
+    if max_area is not None:
+        keep &= areas <= max_area
+    index = index[keep]
+
+    if top_k is not None and len(index) > 0:
+        key = values[index] if smallest else -values[index]
+        if top_k < len(index):
+            part = np.argpartition(key, top_k - 1)[:top_k]
+        else:
+            part = np.arange(len(index))
+        index = index[part[np.argsort(key[part], kind='stable')]]
+
+    selected = [contours[i] for i in index]
+    if return_index:
+        return selected, index
+    return selected
 
 def cut_out_object(im, contour, buffer=3, setsurroundblack=False):
     """
@@ -136,6 +397,269 @@ def cut_out_object(im, contour, buffer=3, setsurroundblack=False):
 
     return cut_img, (x, y, w, h)
 
+
+def cut_out_objects(im, contours=None, boxes=None, buffer=3, size=None, mask=False, fill=0, ragged=False):
+    """Cut out every object in a frame at once
+
+    Batch version of cut_out_object. By default returns a stack of equal
+    sized crops, each centred on its object's bounding box and padded with
+    fill where it runs off the image. The stack is gathered with a single
+    fancy index so there is no python loop over objects.
+
+    Parameters
+    ----------
+    im : image
+    contours : list of contours or PackedContours
+    boxes : (N,4) array of x, y, w, h. Used instead of contours.
+    buffer : pixels added round each bounding box
+    size : (h, w) of each crop. Defaults to the largest box plus buffer.
+    mask : set pixels outside each contour to fill. Needs contours. Where
+        contours overlap the later contour owns the pixels.
+    fill : value for padding and masked pixels
+    ragged : instead of a padded stack return the crops clamped to the
+        image, as cut_out_object does, concatenated into one flat buffer
+
+    Returns
+    -------
+    crops : (N,h,w) or (N,h,w,3) array. If ragged a 1D buffer where crop i
+        is buffer[offsets[i]:offsets[i+1]].reshape(h_i, w_i, ...)
+    offsets : only if ragged, (N+1,) start of each crop in buffer
+    boxes : (N,4) x, y, w, h of each crop in image coordinates. Padded
+        crops can start at negative x, y.
+    """
+    if boxes is None:
+        props = contours_props(contours, rotated=False)
+        boxes = np.stack((props['x'], props['y'], props['w'], props['h']), axis=1)
+    boxes = np.asarray(boxes, dtype=np.int64).reshape(-1, 4)
+    x, y, w, h = boxes.T
+    maxy, maxx = np.shape(im)[:2]
+
+    labels = None
+    if mask:
+        assert contours is not None, 'mask needs contours'
+        labels = np.zeros((maxy, maxx), dtype=np.int32)
+        for i, cnt in enumerate(contours):
+            cv2.drawContours(labels, [cnt], -1, i + 1, -1)
+
+    if ragged:
+        # same clamping as cut_out_object, which keeps the buffered width
+        # when the box is pushed in from the left or top edge
+        x1 = np.maximum(x - buffer, 0)
+        y1 = np.maximum(y - buffer, 0)
+        x2 = np.minimum(x1 + w + 2 * buffer, maxx)
+        y2 = np.minimum(y1 + h + 2 * buffer, maxy)
+        crop_size = (x2 - x1) * (y2 - y1) * int(np.prod(np.shape(im)[2:]))
+        offsets = np.zeros(len(boxes) + 1, dtype=np.int64)
+        np.cumsum(crop_size, out=offsets[1:])
+        crops = np.empty(offsets[-1], dtype=im.dtype)
+        for i in range(len(boxes)):
+            crop = im[y1[i]:y2[i], x1[i]:x2[i]]
+            if labels is not None:
+                crop = np.where(_channel(labels[y1[i]:y2[i], x1[i]:x2[i]] == i + 1, im), crop, fill)
+            crops[offsets[i]:offsets[i + 1]] = crop.ravel()
+        return crops, offsets, np.stack((x1, y1, x2 - x1, y2 - y1), axis=1)
+
+    if size is None:
+        size = (int(h.max(initial=0)) + 2 * buffer, int(w.max(initial=0)) + 2 * buffer)
+    crop_h, crop_w = size
+    x1 = x + (w - crop_w) // 2
+    y1 = y + (h - crop_h) // 2
+    rows = y1[:, np.newaxis] + np.arange(crop_h)
+    cols = x1[:, np.newaxis] + np.arange(crop_w)
+    inside = ((rows >= 0) & (rows < maxy))[:, :, np.newaxis] & ((cols >= 0) & (cols < maxx))[:, np.newaxis, :]
+    rows = np.clip(rows, 0, maxy - 1)[:, :, np.newaxis]
+    cols = np.clip(cols, 0, maxx - 1)[:, np.newaxis, :]
+    if labels is not None:
+        inside &= labels[rows, cols] == np.arange(1, len(boxes) + 1)[:, np.newaxis, np.newaxis]
+    crops = im[rows, cols]
+    crops[~inside] = fill
+    return crops, np.stack((x1, y1, np.full_like(x1, crop_w), np.full_like(y1, crop_h)), axis=1)
+
+
+def _channel(selection, im):
+    """Broadcast a 2D selection over the colour channels of im"""
+    return selection[..., np.newaxis] if np.ndim(im) == 3 else selection
+
+def polygon(xc: float, yc: float, r: float, theta: float, n: int = 6):
+    """Corners of a regular n sided polygon
+
+    Parameters
+    ----------
+    xc, yc : centre
+    r : distance from centre to each corner
+    theta : angle of the first corner in radians
+    n : number of sides
+
+    Returns
+    -------
+    (n, 2) array of corner coordinates
+    """
+    t = theta + 2 * pi * np.arange(n) / n
+    return np.stack((xc + r * np.cos(t), yc + r * np.sin(t)), axis=1)
+
+
+def polygon_dist(params, points, n: int = 6):
+    """Sum of distances from points to the nearest side of a regular polygon
+
+    Each point is measured against the lines through every side at once.
+    The distance to side p is |x.cos(phi_p) + y.sin(phi_p) - r.cos(pi/n)|
+    where phi_p is the angle of that side's normal, which makes the
+    gradient simple to write down.
+
+    Parameters
+    ----------
+    params : (xc, yc, r, theta) as for polygon
+    points : (N, 2) array or contour
+    n : number of sides
+
+    Returns
+    -------
+    distance : float
+    gradient : (4,) array of d(distance)/d(params)
+    """
+    xc, yc, r, theta = params
+    points = np.reshape(points, (-1, 2))
+    dx = points[:, 0, np.newaxis] - xc
+    dy = points[:, 1, np.newaxis] - yc
+    phi = theta + 2 * pi * (np.arange(n) - 0.5) / n
+    cos_phi, sin_phi = np.cos(phi), np.sin(phi)
+    apothem = cos(pi / n)
+    signed = dx * cos_phi + dy * sin_phi - r * apothem
+
+    nearest = np.argmin(np.abs(signed), axis=1)
+    rows = np.arange(len(points))
+    d = signed[rows, nearest]
+    sign = np.sign(d)
+    c, s = cos_phi[nearest], sin_phi[nearest]
+    gradient = np.array([
+        -np.sum(sign * c),
+        -np.sum(sign * s),
+        -np.sum(sign) * apothem,
+        np.sum(sign * (dy[rows, 0] * c - dx[rows, 0] * s))])
+    return np.sum(np.abs(d)), gradient
+
+
+def fit_polygon(contour, n: int = 6, return_params: bool = False):
+    """Fit a regular n sided polygon to a contour
+
+    Starts from the minimum enclosing circle and minimises polygon_dist
+    using its analytic gradient.
+
+    Parameters
+    ----------
+    contour : contour or (N, 2) array of points
+    n : number of sides
+    return_params : if True also return (xc, yc, r, theta)
+
+    Returns
+    -------
+    corners : (n, 2) array
+    """
+    points = np.reshape(contour, (-1, 2)).astype(np.float64)
+    (xc, yc), radius = cv2.minEnclosingCircle(points.astype(np.float32))
+    res = op.minimize(polygon_dist, (xc, yc, radius, 0), args=(points, n), jac=True, method='BFGS')
+    corners = polygon(*res.x, n=n)
+    if return_params:
+        return corners, res.x
+    return corners
+
+
+def _fit_polygon_params(points, n):
+    return fit_polygon(points, n, return_params=True)
+
+
+def fit_polygons(contours, n: int = 6, workers: int = 1, return_params: bool = False):
+    """Fit a regular n sided polygon to every contour in a frame
+
+    Parameters
+    ----------
+    contours : list of contours or PackedContours
+    n : number of sides
+    workers : number of processes. 1 runs in this process, None uses all cpus.
+    return_params : if True also return (N, 4) array of (xc, yc, r, theta)
+
+    Returns
+    -------
+    corners : (N, n, 2) array
+    """
+    points = [np.reshape(cnt, (-1, 2)) for cnt in contours]
+    if workers == 1:
+        results = [_fit_polygon_params(pts, n) for pts in points]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_fit_polygon_params, points, [n] * len(points),
+                                    chunksize=max(1, len(points) // (4 * (workers or 8)))))
+    corners = np.zeros((len(points), n, 2))
+    params = np.zeros((len(points), 4))
+    for i, (c, p) in enumerate(results):
+        corners[i] = c
+        params[i] = p
+    if return_params:
+        return corners, params
+    return corners
+
+
+def find_contours_corners(contours, n: int, aligned: bool = True, return_points: bool = False):
+    """Corners of many contours forming regular polygons in one call
+
+    Batch version of find_contour_corners. Every point is assigned to one
+    of n angular sectors around its contour's minimum enclosing circle
+    centre with np.digitize and the furthest point in each sector is found
+    with a single lexsort rather than a loop over sectors and contours.
+
+    Parameters
+    ----------
+    contours : list of contours or PackedContours
+    n : number of sides
+    aligned : rotate sectors by pi/6 as find_contour_corners does
+    return_points : return corner coordinates instead of indices
+
+    Returns
+    -------
+    corners : (N, n) int64 array of indices into each contour. -1 where a
+        sector has no points. If return_points, (N, n, 2) float array of
+        x, y with nan for empty sectors.
+    centres : (N, 2) array of the enclosing circle centres
+    """
+    packed = contours if isinstance(contours, PackedContours) else PackedContours(contours)
+    centres = np.zeros((len(packed), 2))
+    if len(packed) == 0:
+        if return_points:
+            return np.full((0, n, 2), np.nan), centres
+        return np.zeros((0, n), dtype=np.int64), centres
+    for i, cnt in enumerate(packed):
+        if len(cnt):
+            centres[i] = cv2.minEnclosingCircle(cnt)[0]
+
+    labels = packed.labels
+    vectors = packed.points - centres[labels]
+    if aligned:
+        R = np.array(((cos(pi / 6), -sin(pi / 6)), (sin(pi / 6), cos(pi / 6))))
+        vectors = np.dot(vectors, R)
+    r = vectors[:, 0] ** 2 + vectors[:, 1] ** 2
+    theta = np.arctan2(vectors[:, 1], vectors[:, 0]) * 180 / pi
+    sector = np.digitize(theta, np.linspace(-180, 180, n + 1)) - 1
+    valid = (sector >= 0) & (sector < n)
+
+    point_index = np.flatnonzero(valid)
+    group = labels[valid] * n + sector[valid]
+    # sort by group then r then earliest point so the last of each group is its argmax
+    order = np.lexsort((-point_index, r[valid], group))
+    group = group[order]
+    last = np.flatnonzero(np.append(group[1:] != group[:-1], True))
+
+    corners = np.full(len(packed) * n, -1, dtype=np.int64)
+    corners[group[last]] = point_index[order][last]
+    if return_points:
+        points = np.full((len(packed) * n, 2), np.nan)
+        found = corners >= 0
+        points[found] = packed.points[corners[found]]
+        return points.reshape(-1, n, 2), centres
+    found = corners >= 0
+    corners[found] -= packed.offsets[:-1].repeat(n)[found]
+    return corners.reshape(-1, n), centres
+
+
 #---------------------------------------------------------
 # Untested below here. Kept for historical reasons.
 # Write tests before using.
@@ -178,36 +702,15 @@ def fit_hex(contour):
     """
     Fits a regular hexagon to a list of points.
 
-    Uses scipy.optimize.minimize to minimise the distance between the points
-    and the hexagon.
+    See fit_polygon.
     """
-    (xc, yc), radius = cv2.minEnclosingCircle(contour)
-    res = op.minimize(hex_dist, (xc, yc, radius, 0), args=contour)
-    (xc, yc, r, theta) = res.x
-    hex_corners = hexagon(xc, yc, r, theta)
-    return hex_corners
+    return fit_polygon(contour, 6)
 
 
 def hexagon(xc: int, yc: int, r: int, theta: float):
-    points = [[xc + r * cos(t + theta), yc + r * sin(t + theta)]
-              for t in [0, pi / 3, 2 * pi / 3, pi, 4 * pi / 3, 5 * pi / 3]]
-    return np.array(points)
+    return polygon(xc, yc, r, theta, 6)
 
 
 def hex_dist(params, contour):
     """https://en.wikipedia.org/wiki/Distance_from_a_point_to_a_line"""
-    xc, yc, r, theta = params
-    points = hexagon(xc, yc, r, theta)
-    distances = np.zeros((len(contour), 6))
-    x0, y0 = np.split(contour, 2, axis=1)
-    for p in range(6):
-        x1, y1 = points[p - 1, :]
-        x2, y2 = points[p, :]
-        distance = np.abs(
-            (y2 - y1) * x0 - (x2 - x1) * y0 + x2 * y1 - y2 * x1) / np.sqrt(
-            (y2 - y1) ** 2 + (x2 - x1) ** 2)
-        distances[:, p] = np.squeeze(distance)
-    distances = np.min(distances, axis=1)
-    return np.sum(distances)
-
-
+    return polygon_dist(params, contour, 6)[0]
@@ -136,19 +136,146 @@ def combine_mask(mask1, mask2):
 
     Parameters
     ----------
-    mask1 : binary mask
-    mask2 : binary mask
+    mask1 : binary mask or Mask
+    mask2 : binary mask or Mask
 
     Returns
     -------
-    combined mask
+    combined mask. If either input is a Mask the result is a Mask.
     """
+    if isinstance(mask1, Mask) or isinstance(mask2, Mask):
+        return Mask(mask1) | Mask(mask2)
     return cv2.add(mask1, mask2)
 
 def apply_mask(img, mask):
     """Use a mask to mask an image"""
+    if isinstance(mask, Mask):
+        return mask.apply(img)
     return cv2.bitwise_and(img, mask)
 
+
+class Mask:
+    """A mask built once and applied to many frames
+
+    Stores only the part of the mask inside its bounding box, plus a
+    bit packed copy for saving. apply() crops each frame to the bounding
+    box and masks just that region, so small masks on large frames are
+    cheap.
+
+    Attributes
+    ----------
+    shape : tuple
+        (height, width) of the frames the mask applies to
+    bbox : tuple
+        ((x1,y1),(x2,y2)) bounding box of the non zero pixels, same format as crop
+    region : np.ndarray
+        uint8 mask cropped to bbox
+    packed : np.ndarray
+        np.packbits of region
+
+    Examples
+    --------
+    | mask = combine_mask(Mask.circle(np.shape(img), ((500, 500), (500, 600))),
+    |                     Mask.rect(np.shape(img), ((100, 100), (200, 300))))
+    | for frame in readvid:
+    |     masked = mask.apply(frame)
+
+    """
+
+    def __init__(self, mask):
+        """mask is a binary mask like those returned by mask_circle etc or another Mask"""
+        if isinstance(mask, Mask):
+            self.shape = mask.shape
+            self.bbox = mask.bbox
+            self.region = mask.region
+            self.packed = mask.packed
+            self._where = mask._where
+            return
+        mask = np.asarray(mask)
+        self.shape = np.shape(mask)[:2]
+        if np.ndim(mask) == 3:
+            mask = mask[:, :, 0]
+        ys, xs = np.nonzero(np.any(mask, axis=1))[0], np.nonzero(np.any(mask, axis=0))[0]
+        if len(ys) == 0:
+            self.bbox = ((0, 0), (0, 0))
+        else:
+            self.bbox = ((int(xs[0]), int(ys[0])), (int(xs[-1]) + 1, int(ys[-1]) + 1))
+        (x1, y1), (x2, y2) = self.bbox
+        self.region = np.where(mask[y1:y2, x1:x2] > 0, 255, 0).astype(np.uint8)
+        self.packed = np.packbits(self.region > 0, axis=-1)
+        self._where = self.region > 0
+
+    @classmethod
+    def circle(cls, shape : Tuple[int,int], pts : Pts):
+        return cls(mask_circle(shape[:2], pts))
+
+    @classmethod
+    def rect(cls, shape : Tuple[int,int], pts : Pts):
+        return cls(mask_rect(shape[:2], pts))
+
+    @classmethod
+    def ellipse(cls, shape : Tuple[int,int], pts : Pts):
+        return cls(mask_ellipse(shape[:2], pts))
+
+    @classmethod
+    def polygon(cls, shape : Tuple[int,int], pts : Pts):
+        return cls(mask_polygon(shape[:2], pts))
+
+    @classmethod
+    def from_packed(cls, shape, bbox, packed):
+        """Rebuild a Mask from its shape, bbox and packed bits"""
+        (x1, y1), (x2, y2) = bbox
+        mask = _create_zeros_mask(shape)
+        region = np.unpackbits(packed, axis=-1, count=x2 - x1)
+        mask[y1:y2, x1:x2] = region * 255
+        return cls(mask)
+
+    def to_array(self):
+        """Full size uint8 mask"""
+        mask = _create_zeros_mask(self.shape)
+        (x1, y1), (x2, y2) = self.bbox
+        mask[y1:y2, x1:x2] = self.region
+        return mask
+
+    def __or__(self, other):
+        other = other if isinstance(other, Mask) else Mask(other)
+        assert self.shape == other.shape, 'Masks must be the same shape'
+        return Mask(cv2.bitwise_or(self.to_array(), other.to_array()))
+
+    def apply(self, img, out=None, crop=False):
+        """Mask an image
+
+        Parameters
+        ----------
+        img : colour or grayscale frame
+        out : optional array to write the result into. Must be the shape of
+            img, or the shape of the bbox region if crop is True. Only the
+            bbox region is written so pixels outside it keep their values.
+            Pass a zeroed array and reuse it with the same mask.
+        crop : if True return only the bbox region of the masked image
+
+        Returns
+        -------
+        masked image
+        """
+        assert tuple(np.shape(img)[:2]) == tuple(self.shape), 'Image is wrong shape for mask'
+        (x1, y1), (x2, y2) = self.bbox
+        region = img[y1:y2, x1:x2]
+        where = self._where if np.ndim(img) == 2 else self._where[:, :, None]
+        if crop:
+            if out is None:
+                out = np.zeros_like(region)
+            else:
+                out[...] = 0
+            np.copyto(out, region, where=where)
+            return out
+        if out is None:
+            out = np.zeros_like(img)
+        else:
+            out[y1:y2, x1:x2] = 0
+        np.copyto(out[y1:y2, x1:x2], region, where=where)
+        return out
+
 def _create_zeros_mask(shape : Tuple[int, int]):
     zeros_mask = np.zeros(shape, dtype=np.uint8)
     return zeros_mask
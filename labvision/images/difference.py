@@ -0,0 +1,110 @@
+import cv2
+import numpy as np
+
+__all__ = ['absdiff', 'balanced_absdiff']
+
+"""Difference imaging
+
+Functions here write into an out= array when one is supplied, so a buffer
+can be reused for every frame of a video. Scalars are passed to OpenCV as
+a 4 element Scalar rather than expanded into a full frame.
+"""
+
+
+def _scalar(value):
+    return (float(value),) * 4
+
+
+def _is_stack(img):
+    """(N,H,W) or (N,H,W,3). A 3D array with 3 in the last dimension is a colour image."""
+    return np.ndim(img) == 4 or (np.ndim(img) == 3 and np.shape(img)[2] != 3)
+
+
+def _normalise(img, per_frame, stacked):
+    if stacked and per_frame:
+        for frame in img:
+            cv2.normalize(frame, frame, 0, 255, cv2.NORM_MINMAX)
+    else:
+        cv2.normalize(img, img, 0, 255, cv2.NORM_MINMAX)
+    return img
+
+
+def absdiff(img, reference=0, normalise=False, out=None, per_frame=True):
+    """Absolute difference between an image and a reference
+
+    Parameters
+    ----------
+    img: single image or stack of images with shape (N,H,W) or (N,H,W,3).
+        With a scalar reference a 3D array is treated as a colour image if
+        its last dimension is 3 and as a stack otherwise.
+
+    reference: scalar or image the same shape as a single frame of img.
+        When img is a stack every frame is compared to this one reference.
+
+    normalise: if True stretch the result to fill 0-255
+
+    out: optional array the same shape and dtype as img to write into.
+        Passing img itself works in place.
+
+    per_frame: if normalising a stack, normalise each frame separately
+        (True) or use the min and max of the whole stack (False)
+
+    Returns
+    -------
+    out: absolute difference, same shape and type as img
+    """
+    if out is None:
+        out = np.empty_like(img)
+    assert np.shape(out) == np.shape(img), 'out must be same shape as img'
+
+    if np.ndim(reference) == 0:
+        stacked = _is_stack(img)
+        reference = _scalar(reference)
+    else:
+        stacked = np.ndim(img) > np.ndim(reference)
+
+    if stacked:
+        for frame, out_frame in zip(img, out):
+            cv2.absdiff(frame, reference, dst=out_frame)
+    else:
+        cv2.absdiff(img, reference, dst=out)
+
+    if normalise:
+        _normalise(out, per_frame, stacked)
+    return out
+
+
+def balanced_absdiff(img, value, normalise=False, out=None):
+    """Absolute difference from value with each side stretched separately
+
+    The pixels darker than value and the pixels brighter than value are
+    each stretched to 0-255 before being added together. This is what
+    absolute_diff has always returned.
+
+    Parameters
+    ----------
+    img: uint8 image
+
+    value: scalar intensity to compare to
+
+    normalise: stretch the final result to fill 0-255
+
+    out: optional uint8 array same shape as img to write into
+
+    Returns
+    -------
+    out: same shape and type as img
+    """
+    if out is None:
+        out = np.empty_like(img)
+    below = np.empty_like(img)
+    # 255 - saturate(img + 255 - value) is value - img clipped at zero
+    cv2.add(img, _scalar(255 - value), dst=below)
+    cv2.bitwise_not(below, dst=below)
+    cv2.normalize(below, below, 0, 255, cv2.NORM_MINMAX)
+    cv2.subtract(img, _scalar(value), dst=out)
+    cv2.normalize(out, out, 0, 255, cv2.NORM_MINMAX)
+    cv2.add(below, out, dst=out)
+    if normalise:
+        cv2.normalize(out, out, 0, 255, cv2.NORM_MINMAX)
+    return out
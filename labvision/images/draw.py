@@ -1,4 +1,5 @@
 from .colours import *
+from .contours import PackedContours
 import cv2
 import numpy as np
 from matplotlib import cm
@@ -73,7 +74,7 @@ def draw_contours(img, contours, color=RED, thickness=1):
     Takes a set of contours and draws them on an image
 
     :param img: rgb image (np.ndarray)
-    :param contours: a set of contours produced by find_contours
+    :param contours: a set of contours produced by find_contours or a PackedContours
     :param col: colour -> See colors.py for defined values. Can also pass list of colors same length as contours to specify colour of each contour in order.
     :param thickness: -> thickness of line. -1 will fill enclosed contour
 
@@ -82,6 +83,8 @@ def draw_contours(img, contours, color=RED, thickness=1):
     """
 
     assert len(np.shape(img)) == 3, "Image needs to be 3 channel"
+    if isinstance(contours, PackedContours):
+        contours = contours.to_list()
     if (np.size(np.shape(color)) == 0) | (np.size(np.shape(color)) == 1):
         img = cv2.drawContours(img, contours, -1, color, thickness)
     else:
@@ -1,5 +1,8 @@
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
+from scipy.spatial import cKDTree
 import matplotlib.pyplot as plt
 
 from qtwidgets.config import ConfigGui
@@ -18,7 +21,7 @@ __all__ = [
 
 
 
-def find_circles(img: np.ndarray, min_dist: int=5, p1: int=70, p2: int=10, min_rad: int=10, max_rad: int=50, dp: int=1, configure=False):
+def find_circles(img: np.ndarray, min_dist: int=5, p1: int=70, p2: int=10, min_rad: int=10, max_rad: int=50, dp: int=1, tiles=1, workers=None, configure=False):
     """find_circles
 
     Finds circles in an image using OpenCV HoughCircles. 
@@ -40,6 +43,14 @@ def find_circles(img: np.ndarray, min_dist: int=5, p1: int=70, p2: int=10, min_r
         max radius of circle
     dp : int, optional
         , by default 1
+    tiles : int or (rows, cols), optional
+        split large images into tiles which are searched on separate
+        threads. Tiles overlap by max_rad so every circle lies wholly in
+        the tile that owns its centre. Circles closer than min_dist across
+        a tile boundary are merged. Order differs from the untiled result.
+        max_rad must be > 0 when tiling.
+    workers : int, optional
+        number of threads used with tiles. None lets python decide.
 
     Returns
     -------
@@ -70,17 +81,58 @@ def find_circles(img: np.ndarray, min_dist: int=5, p1: int=70, p2: int=10, min_r
         circles = find_circles(img, **gui.reduced_dict)
         gui.app.quit()
     else:
-        circles = cv2.HoughCircles(
-            img,
-            cv2.HOUGH_GRADIENT, dp=dp,
-            minDist=min_dist,
-            param1=p1,
-            param2=p2,
-            minRadius=min_rad,
-            maxRadius=max_rad)
+        params = dict(dp=dp, minDist=min_dist, param1=p1, param2=p2, minRadius=min_rad, maxRadius=max_rad)
+        if np.size(tiles) == 1 and int(np.squeeze(tiles)) == 1:
+            circles = cv2.HoughCircles(img, cv2.HOUGH_GRADIENT, **params)
+        else:
+            circles = _find_circles_tiled(img, tiles, workers, params)
     return np.squeeze(circles)
 
 
+def _tile_bounds(length, n, overlap):
+    """Start and stop of the core of each tile and of the tile plus overlap"""
+    edges = np.linspace(0, length, n + 1).astype(int)
+    core = list(zip(edges[:-1], edges[1:]))
+    padded = [(max(start - overlap, 0), min(stop + overlap, length)) for start, stop in core]
+    return core, padded
+
+
+def _find_circles_tiled(img, tiles, workers, params):
+    """HoughCircles on overlapping tiles. Returns (1,N,3) like HoughCircles or None."""
+    assert params['maxRadius'] > 0, 'tiles needs max_rad > 0 to set the overlap'
+    rows, cols = (tiles, tiles) if np.size(tiles) == 1 else tiles
+    overlap = int(np.ceil(params['maxRadius']))
+    row_core, row_pad = _tile_bounds(img.shape[0], int(rows), overlap)
+    col_core, col_pad = _tile_bounds(img.shape[1], int(cols), overlap)
+    jobs = [(rc, rp, cc, cp) for rc, rp in zip(row_core, row_pad) for cc, cp in zip(col_core, col_pad)]
+
+    def search(job):
+        (r0, r1), (pr0, pr1), (c0, c1), (pc0, pc1) = job
+        found = cv2.HoughCircles(np.ascontiguousarray(img[pr0:pr1, pc0:pc1]), cv2.HOUGH_GRADIENT, **params)
+        if found is None:
+            return np.zeros((0, 3), dtype=np.float32)
+        found = found[0, :, :3] + np.array([pc0, pr0, 0], dtype=np.float32)
+        # keep only circles centred in this tile's core so each is found once
+        owned = (found[:, 0] >= c0) & (found[:, 0] < c1) & (found[:, 1] >= r0) & (found[:, 1] < r1)
+        return found[owned]
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        circles = np.concatenate(list(pool.map(search, jobs)))
+    if len(circles) == 0:
+        return None
+
+    # the same circle can be found either side of a boundary with centres
+    # a little apart. Keep the first of any pair closer than minDist.
+    keep = np.ones(len(circles), dtype=bool)
+    pairs = cKDTree(circles[:, :2]).query_pairs(params['minDist'], output_type='ndarray')
+    if len(pairs):
+        pairs = pairs[np.lexsort((pairs[:, 1], pairs[:, 0]))]
+        for i, j in pairs:
+            if keep[i]:
+                keep[j] = False
+    return circles[keep][np.newaxis]
+
+
 def find_connected_components(bw_img: np.ndarray, connectivity: int=4, option=cv2.CV_32S):
     """Find binary collections of pixels that are connected together.
 
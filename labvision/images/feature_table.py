@@ -0,0 +1,176 @@
+import numpy as np
+
+__all__ = ['FeatureTable']
+
+
+CIRCLE_COLUMNS = {'x': np.float32, 'y': np.float32, 'r': np.float32}
+CONTOUR_COLUMNS = {'cx': np.float32, 'cy': np.float32,
+                   'perimeter': np.float32, 'area': np.float32}
+COMPONENT_COLUMNS = {'cx': np.float32, 'cy': np.float32,
+                     'left': np.int32, 'top': np.int32,
+                     'width': np.int32, 'height': np.int32,
+                     'area': np.int32}
+
+
+class FeatureTable:
+    """Columnar, append-only store for per frame features
+
+    Each column is a single numpy array rather than a list of python
+    tuples, so storing millions of detections costs only the bytes of the
+    numbers themselves. Every row also stores the frame it came from in
+    the 'frame' column. Arrays grow in chunks of chunk_size rows.
+
+    Attributes
+    ----------
+    columns : dict
+        column name : numpy dtype. 'frame' is always added.
+    chunk_size : int
+        number of rows added each time the table runs out of space
+
+    Examples
+    --------
+    | table = FeatureTable.for_circles()
+    | for i, frame in enumerate(readvid):
+    |     table.add_circles(i, find_circles(frame))
+    | table.save('circles.npz')
+
+    """
+
+    def __init__(self, columns: dict, chunk_size: int = 65536):
+        self.columns = {'frame': np.int32}
+        self.columns.update(columns)
+        self.chunk_size = int(chunk_size)
+        self._capacity = 0
+        self._length = 0
+        self._data = {name: np.empty(0, dtype=dtype)
+                      for name, dtype in self.columns.items()}
+
+    @classmethod
+    def for_circles(cls, chunk_size: int = 65536):
+        """Table with x, y, r columns to hold output of find_circles"""
+        return cls(CIRCLE_COLUMNS, chunk_size=chunk_size)
+
+    @classmethod
+    def for_contours(cls, chunk_size: int = 65536):
+        """Table with cx, cy, perimeter, area columns to hold output of contour_props"""
+        return cls(CONTOUR_COLUMNS, chunk_size=chunk_size)
+
+    @classmethod
+    def for_components(cls, chunk_size: int = 65536):
+        """Table with centroid and stats columns to hold output of find_connected_components"""
+        return cls(COMPONENT_COLUMNS, chunk_size=chunk_size)
+
+    def __len__(self):
+        return self._length
+
+    def __getitem__(self, name):
+        """Returns a view of the filled part of a column"""
+        return self._data[name][:self._length]
+
+    def __contains__(self, name):
+        return name in self._data
+
+    def _reserve(self, n):
+        """Make sure there is space for n more rows"""
+        needed = self._length + n
+        if needed <= self._capacity:
+            return
+        n_chunks = -(-(needed - self._capacity) // self.chunk_size)
+        self._capacity += n_chunks * self.chunk_size
+        for name, col in self._data.items():
+            new_col = np.empty(self._capacity, dtype=col.dtype)
+            new_col[:self._length] = col[:self._length]
+            self._data[name] = new_col
+
+    def append(self, frame: int, **cols):
+        """Append a block of rows all belonging to one frame
+
+        Parameters
+        ----------
+        frame : int
+            frame index stored in the 'frame' column of every row
+        cols : array_like
+            one keyword per column (except 'frame'), all the same length.
+        """
+        missing = set(self.columns) - set(cols) - {'frame'}
+        assert not missing, 'Missing columns: ' + str(missing)
+        extra = set(cols) - set(self.columns)
+        assert not extra, 'Unknown columns: ' + str(extra)
+        cols = {name: np.atleast_1d(values) for name, values in cols.items()}
+        n = len(next(iter(cols.values())))
+        assert all(len(values) == n for values in cols.values()), 'All columns must be the same length'
+        self._reserve(n)
+        rows = slice(self._length, self._length + n)
+        self._data['frame'][rows] = frame
+        for name, values in cols.items():
+            self._data[name][rows] = values
+        self._length += n
+
+    def add_circles(self, frame: int, circles):
+        """Append the output of find_circles for one frame
+
+        Handles the squeezed shapes find_circles returns i.e None when
+        nothing is found and (3,) when one circle is found.
+        """
+        if circles is None or np.size(circles) == 0:
+            return
+        circles = np.reshape(circles, (-1, 3))
+        self.append(frame, x=circles[:, 0], y=circles[:, 1], r=circles[:, 2])
+
+    def add_contour_props(self, frame: int, props):
+        """Append a list of contour_props results for one frame
+
+        props is a list like [((cx, cy), perimeter, area), ...]
+        """
+        if len(props) == 0:
+            return
+        centres = np.array([p[0] for p in props], dtype=np.float32)
+        perims = np.fromiter((p[1] for p in props), dtype=np.float32, count=len(props))
+        areas = np.fromiter((p[2] for p in props), dtype=np.float32, count=len(props))
+        self.append(frame, cx=centres[:, 0], cy=centres[:, 1],
+                    perimeter=perims, area=areas)
+
+    def add_components(self, frame: int, labels, stats, centroids):
+        """Append the output of find_connected_components for one frame
+
+        The background component (label 0) is skipped.
+        """
+        stats = stats[1:]
+        centroids = centroids[1:]
+        if len(stats) == 0:
+            return
+        self.append(frame,
+                    cx=centroids[:, 0], cy=centroids[:, 1],
+                    left=stats[:, 0], top=stats[:, 1],
+                    width=stats[:, 2], height=stats[:, 3],
+                    area=stats[:, 4])
+
+    def frame_rows(self, frame: int):
+        """Returns dict of the rows belonging to a single frame"""
+        select = self['frame'] == frame
+        return {name: self[name][select] for name in self.columns}
+
+    def to_dict(self):
+        """Returns dict of trimmed column arrays"""
+        return {name: self[name] for name in self.columns}
+
+    def save(self, filename: str, compressed: bool = False):
+        """Save the table to a .npz file with one array per column"""
+        if compressed:
+            np.savez_compressed(filename, **self.to_dict())
+        else:
+            np.savez(filename, **self.to_dict())
+
+    @classmethod
+    def load(cls, filename: str, chunk_size: int = 65536):
+        """Load a table previously written with save"""
+        with np.load(filename) as data:
+            cols = {name: data[name] for name in data.files}
+        table = cls({name: col.dtype for name, col in cols.items()
+                     if name != 'frame'}, chunk_size=chunk_size)
+        n = len(cols['frame'])
+        table._reserve(n)
+        for name, col in cols.items():
+            table._data[name][:n] = col
+        table._length = n
+        return table
@@ -6,7 +6,7 @@ from labvision.custom_exceptions import NotImageError
 from .basics import *
 from .colours import *
 
-__all__ = ['resize', 'rotate', 'hstack', 'vstack', 'to_uint8']
+__all__ = ['resize', 'rotate', 'hstack', 'vstack', 'to_uint8', 'normalise_uint8', 'GeometricCorrector', 'ImagePyramid', 'Mosaic']
 
 
 def get_shape(img):
@@ -85,9 +85,17 @@ def rotate(img, angle):
         May have different dimensions than the original image
 
     """
+    rot_matrix, (n_w, n_h) = _rotation_matrix(np.shape(img), angle)
+
+    # perform the actual rotation and return the image
+    out = cv2.warpAffine(img, rot_matrix, (n_w, n_h))
+    return out
+
+
+def _rotation_matrix(img_shape, angle):
+    """Affine matrix and output (width, height) used by rotate"""
     # grab the dimensions of the image and then determine the
     # center
-    img_shape = np.shape(img)
     (h, w) = img_shape[:2]
     (c_x, c_y) = (w // 2, h // 2)
 
@@ -105,10 +113,7 @@ def rotate(img, angle):
     # adjust the rotation matrix to take into account translation
     rot_matrix[0, 2] += (n_w / 2) - c_x
     rot_matrix[1, 2] += (n_h / 2) - c_y
-
-    # perform the actual rotation and return the image
-    out = cv2.warpAffine(img, rot_matrix, (n_w, n_h))
-    return out
+    return rot_matrix, (n_w, n_h)
 
 
 def hstack(*args):
@@ -144,7 +149,321 @@ def vstack(*args):
     return np.vstack(args)
 
 
+class Mosaic:
+    """Grid of images drawn into one preallocated canvas
+
+    Replaces calling hstack / vstack every frame to build a multi panel
+    view. The canvas is allocated once and each panel is copied straight
+    into its slot. Grayscale panels are converted to BGR as they are
+    copied if the canvas is colour.
+
+    Attributes
+    ----------
+    grid : tuple
+        (rows, cols)
+    panel_size : tuple
+        (height, width) of each panel
+    depth : int
+        3 for a BGR canvas, 1 for grayscale
+    canvas : np.ndarray
+        the output image. Reused on every update.
+
+    Examples
+    --------
+    | mosaic = Mosaic((2, 3), np.shape(frame)[:2])
+    | for frame in readvid:
+    |     bw_img = threshold(bgr_to_gray(frame))
+    |     view = mosaic.update(frame, bw_img, ...)
+
+    """
+
+    def __init__(self, grid, panel_size, depth=3, dtype=np.uint8):
+        self.grid = tuple(grid)
+        self.panel_size = tuple(panel_size[:2])
+        self.depth = depth
+        rows, cols = self.grid
+        h, w = self.panel_size
+        shape = (rows * h, cols * w, depth) if depth != 1 else (rows * h, cols * w)
+        self.canvas = np.zeros(shape, dtype=dtype)
+
+    def slot(self, index):
+        """View of the canvas for panel index (counting along rows) or (row, col)"""
+        if np.ndim(index) == 0:
+            index = divmod(index, self.grid[1])
+        row, col = index
+        h, w = self.panel_size
+        return self.canvas[row * h:(row + 1) * h, col * w:(col + 1) * w]
+
+    def __setitem__(self, index, img):
+        self.set_panel(index, img)
+
+    def set_panel(self, index, img):
+        """Copy img into its slot, resizing if it is not panel_size"""
+        slot = self.slot(index)
+        if np.shape(img)[:2] != self.panel_size:
+            h, w = self.panel_size
+            img = cv2.resize(img, (w, h), interpolation=cv2.INTER_AREA)
+        img_depth = get_shape(img)[2]
+        if img_depth == self.depth:
+            slot[...] = img
+        elif img_depth == 1:
+            slot[...] = img[:, :, np.newaxis]
+        else:
+            slot[...] = bgr_to_gray(img)
+        return slot
+
+    def update(self, *imgs):
+        """Write each image into the next panel and return the canvas"""
+        assert len(imgs) <= self.grid[0] * self.grid[1], 'More images than panels'
+        for index, img in enumerate(imgs):
+            self.set_panel(index, img)
+        return self.canvas
+
+
 def to_uint8(im):
-    """Convert image to 8 bit"""
-    im = (im - np.min(im)) / (np.max(im) - np.min(im)) * 255
-    return np.uint8(im)
+    """Convert image to 8 bit by stretching its min and max to 0 and 255
+
+    See normalise_uint8 for more options.
+    """
+    return normalise_uint8(im)
+
+
+# dtypes OpenCV can read directly
+_CV_DTYPES = (np.uint8, np.int8, np.uint16, np.int16, np.int32, np.float32, np.float64)
+
+
+def _as_2d(im):
+    """2D view OpenCV can treat as a single channel image"""
+    return np.reshape(im, (np.shape(im)[0], -1))
+
+
+def _value_range(im, vmin, vmax, percentiles):
+    if vmin is not None and vmax is not None:
+        return vmin, vmax
+    if percentiles is not None:
+        low, high = np.percentile(im, percentiles)
+    else:
+        low, high = cv2.minMaxLoc(_as_2d(im))[:2]
+    return (low if vmin is None else vmin), (high if vmax is None else vmax)
+
+
+def _scale_to_uint8(im, out, vmin, vmax):
+    alpha = 255.0 / (vmax - vmin) if vmax > vmin else 0.0
+    beta = -vmin * alpha
+    src = _as_2d(im)
+    cv2.addWeighted(src, alpha, src, 0, beta, dst=_as_2d(out), dtype=cv2.CV_8U)
+
+
+def normalise_uint8(im, out=None, vmin=None, vmax=None, percentiles=None, stack=False, per_frame=True):
+    """Scale an image or stack of images to uint8 in a single pass
+
+    Values at vmin become 0 and at vmax become 255. Values outside the range
+    are clipped. The scaling and conversion happen in one OpenCV call
+    writing straight into out, with no float64 temporaries.
+
+    Parameters
+    ----------
+    im: image or (N,H,W) / (N,H,W,3) stack. Any numeric dtype.
+
+    out: optional uint8 array with the shape of im to write into
+
+    vmin, vmax: fixed range. If None they are taken from the data.
+
+    percentiles: e.g (1, 99) sets any range not given by vmin / vmax from
+        these percentiles of the data instead of the min and max, which stops
+        a few hot pixels squashing the contrast.
+
+    stack: True if im is a stack of frames
+
+    per_frame: for a stack, scale each frame by its own range (True) or use
+        one range for the whole stack (False)
+
+    Returns
+    -------
+    out: uint8 array same shape as im
+    """
+    im = np.asarray(im)
+    if im.dtype.type not in _CV_DTYPES:
+        im = im.astype(np.float64)
+    if out is None:
+        out = np.empty(np.shape(im), dtype=np.uint8)
+    assert np.shape(out) == np.shape(im) and out.dtype == np.uint8, 'out must be uint8 and same shape as im'
+    assert out.flags['C_CONTIGUOUS'], 'out must be contiguous'
+
+    if stack and per_frame:
+        for frame, out_frame in zip(im, out):
+            _scale_to_uint8(frame, out_frame, *_value_range(frame, vmin, vmax, percentiles))
+    else:
+        _scale_to_uint8(im, out, *_value_range(im, vmin, vmax, percentiles))
+    return out
+
+
+class GeometricCorrector:
+    """Fixed geometric correction applied with one cv2.remap per frame
+
+    Lens undistortion, rotation (as in rotate), a perspective warp and a
+    crop are combined into a single pixel map when the object is created.
+    The map is stored in OpenCV's fixed point CV_16SC2 format, which is
+    the fastest form for cv2.remap. Steps are applied in the order
+    undistort, rotate, perspective, crop. Any of them can be left out.
+
+    Attributes
+    ----------
+    frame_size : tuple
+        np.shape of the input frames
+    camera_matrix, dist_coeffs : np.ndarray
+        camera calibration from cv2.calibrateCamera used for undistortion
+    angle : float
+        clockwise rotation in degrees. The frame grows so nothing is cropped.
+    perspective : np.ndarray
+        3x3 matrix e.g from cv2.getPerspectiveTransform
+    perspective_size : tuple
+        (width, height) after the perspective warp. Defaults to the size
+        before it.
+    cropbox : tuple
+        ((x1,y1),(x2,y2)) crop of the final image, same format as crop
+    output_size : tuple
+        (width, height) of the corrected frames
+
+    Examples
+    --------
+    | corrector = GeometricCorrector(np.shape(frame), angle=2.5, cropbox=((100, 50), (1800, 1000)))
+    | for frame in readvid:
+    |     frame = corrector.apply(frame)
+
+    """
+
+    def __init__(self, frame_size, camera_matrix=None, dist_coeffs=None, angle=0,
+                 perspective=None, perspective_size=None, cropbox=None,
+                 interpolation=cv2.INTER_LINEAR):
+        self.frame_size = tuple(frame_size)
+        self.interpolation = interpolation
+        h, w = frame_size[:2]
+        size = (w, h)
+
+        # inverse transforms mapping output coords back to input coords,
+        # in the order the steps are applied
+        inverse_steps = []
+        if angle != 0:
+            rot_matrix, size = _rotation_matrix(frame_size, angle)
+            inverse_steps.append(('affine', cv2.invertAffineTransform(rot_matrix)))
+        if perspective is not None:
+            if perspective_size is not None:
+                size = tuple(perspective_size)
+            inverse_steps.append(('perspective', np.linalg.inv(perspective)))
+
+        if cropbox is None:
+            cropbox = ((0, 0), size)
+        (x1, y1), (x2, y2) = cropbox
+        self.output_size = (x2 - x1, y2 - y1)
+
+        xs, ys = np.meshgrid(np.arange(x1, x2, dtype=np.float64),
+                             np.arange(y1, y2, dtype=np.float64))
+        for kind, matrix in reversed(inverse_steps):
+            if kind == 'affine':
+                xs, ys = (matrix[0, 0] * xs + matrix[0, 1] * ys + matrix[0, 2],
+                          matrix[1, 0] * xs + matrix[1, 1] * ys + matrix[1, 2])
+            else:
+                denom = matrix[2, 0] * xs + matrix[2, 1] * ys + matrix[2, 2]
+                xs, ys = ((matrix[0, 0] * xs + matrix[0, 1] * ys + matrix[0, 2]) / denom,
+                          (matrix[1, 0] * xs + matrix[1, 1] * ys + matrix[1, 2]) / denom)
+        xs = xs.astype(np.float32)
+        ys = ys.astype(np.float32)
+
+        if camera_matrix is not None:
+            undistort_x, undistort_y = cv2.initUndistortRectifyMap(
+                camera_matrix, dist_coeffs, None, camera_matrix, (w, h), cv2.CV_32FC1)
+            # look up where each undistorted pixel comes from in the raw frame
+            xs, ys = (cv2.remap(undistort_x, xs, ys, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=-1),
+                      cv2.remap(undistort_y, xs, ys, cv2.INTER_LINEAR, borderMode=cv2.BORDER_CONSTANT, borderValue=-1))
+
+        self.map1, self.map2 = cv2.convertMaps(xs, ys, cv2.CV_16SC2)
+
+    def apply(self, img, out=None):
+        """Correct a frame, writing into out if supplied"""
+        assert np.shape(img)[:2] == self.frame_size[:2], 'Frame is wrong size for corrector'
+        return cv2.remap(img, self.map1, self.map2, self.interpolation, dst=out,
+                         borderMode=cv2.BORDER_CONSTANT)
+
+
+class ImagePyramid:
+    """Lazily built and cached set of downsampled copies of a frame
+
+    Level 0 is the frame itself. Each level is made from the one above
+    the first time it is requested and then kept, so multi scale code can
+    ask for the same level many times without recomputing it.
+
+    Attributes
+    ----------
+    img : np.ndarray
+        the full size frame
+    method : str
+        'pyrdown' uses cv2.pyrDown (gaussian blur then halve).
+        'area' uses cv2.resize with INTER_AREA and scale.
+    scale : float
+        size of each level relative to the one above for method='area'
+    max_levels : int
+        largest level number that can be requested
+
+    Examples
+    --------
+    | pyramid = ImagePyramid(frame)
+    | coarse = pyramid[3]
+    | x, y = pyramid.to_level((cx, cy), 3, 0)
+
+    ReadVideo can return pyramids instead of frames:
+
+    | for pyramid in ReadVideo(filename, return_function=ImagePyramid):
+    |     DoStuff(pyramid[2])
+
+    """
+
+    def __init__(self, img, method='pyrdown', scale=0.5, max_levels=8):
+        assert method in ('pyrdown', 'area'), 'method must be pyrdown or area'
+        self.img = img
+        self.method = method
+        self.scale = scale
+        self.max_levels = max_levels
+        self._levels = [img]
+
+    def __getitem__(self, level):
+        assert 0 <= level <= self.max_levels, 'level out of range'
+        while len(self._levels) <= level:
+            above = self._levels[-1]
+            if self.method == 'pyrdown':
+                below = cv2.pyrDown(above)
+            else:
+                h, w = np.shape(above)[:2]
+                size = (max(int(round(w * self.scale)), 1), max(int(round(h * self.scale)), 1))
+                below = cv2.resize(above, size, interpolation=cv2.INTER_AREA)
+            self._levels.append(below)
+        return self._levels[level]
+
+    def __len__(self):
+        """Number of levels built so far"""
+        return len(self._levels)
+
+    def shape(self, level):
+        return np.shape(self[level])
+
+    def level_scale(self, level):
+        """(x, y) size of level relative to level 0"""
+        h0, w0 = np.shape(self.img)[:2]
+        h, w = np.shape(self[level])[:2]
+        return w / w0, h / h0
+
+    def to_level(self, pts, from_level, to_level):
+        """Convert (x, y) coords between levels
+
+        pts can be a single (x, y) or an (N, 2) array. Uses pixel centre
+        coordinates so a pixel maps to the pixel covering the same area.
+        """
+        sx_from, sy_from = self.level_scale(from_level)
+        sx_to, sy_to = self.level_scale(to_level)
+        pts = np.asarray(pts, dtype=np.float64)
+        factor = np.array([sx_to / sx_from, sy_to / sy_from])
+        return (pts + 0.5) * factor - 0.5
+
+    def copy(self):
+        """New pyramid over a copy of the frame. Lets ReadVideo use ImagePyramid as its return_function"""
+        return ImagePyramid(self.img.copy(), method=self.method, scale=self.scale, max_levels=self.max_levels)
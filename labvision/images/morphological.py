@@ -1,8 +1,10 @@
+from functools import lru_cache
+
 import cv2
 import numpy as np
 from qtwidgets.config import ConfigGui
 
-__all__ = ['dilate', 'erode', 'closing', 'opening']
+__all__ = ['dilate', 'erode', 'closing', 'opening', 'get_kernel', 'MorphChain', 'morph_chain']
 
 """Morphological operations
     
@@ -10,6 +12,38 @@ This is a really good reference: https://notebook.community/thetdg/PyImage/Morph
   
 """
 
+def get_kernel(kernel=3, kernel_type=None):
+    """Structuring element for the morphological operations
+
+    Kernels are cached so repeated calls with the same arguments return
+    the same (read only) array rather than building a new one.
+
+    Parameters
+    ----------
+    kernel: single int x produces kernel (x,x). Can also supply tuple giving (width, height)
+
+    kernel_type: None gives a rectangle of ones otherwise cv2.MORPH_RECT,
+        cv2.MORPH_ELLIPSE or cv2.MORPH_CROSS
+
+    Returns
+    -------
+    uint8 kernel
+    """
+    if np.ndim(kernel) == 0:
+        kernel = (kernel, kernel)
+    return _cached_kernel(int(kernel[0]), int(kernel[1]), kernel_type)
+
+
+@lru_cache(maxsize=64)
+def _cached_kernel(width, height, kernel_type):
+    if kernel_type is not None:
+        kernel = cv2.getStructuringElement(kernel_type, (width, height))
+    else:
+        kernel = np.ones((height, width), dtype=np.uint8)
+    kernel.flags.writeable = False
+    return kernel
+
+
 def dilate(img, kernel=3, kernel_type=None, iterations=1, configure=False):
     """
     Dilates an image by using a specific structuring element.
@@ -45,12 +79,7 @@ def dilate(img, kernel=3, kernel_type=None, iterations=1, configure=False):
         out = dilate(img, **gui.reduced_dict)
         gui.app.quit()
     else:
-        if type(kernel) == int:
-            kernel = (kernel, kernel)
-        if kernel_type is not None:
-            kernel = cv2.getStructuringElement(kernel_type, kernel)
-        else:
-            kernel = np.ones(kernel)
+        kernel = get_kernel(kernel, kernel_type)
         out = cv2.dilate(img, kernel, iterations=iterations)
     return out
 
@@ -91,17 +120,12 @@ def erode(img, kernel=3, kernel_type=None, iterations=1, configure=False):
         out =erode(img, **gui.reduced_dict)
         gui.app.quit()
     else:
-        if type(kernel) == int:
-            kernel = (kernel, kernel)
-        if kernel_type is not None:
-            kernel = cv2.getStructuringElement(kernel_type, kernel)
-        else:
-            kernel = np.ones(kernel)
-        out = cv2.erode(img, kernel, iterations)
+        kernel = get_kernel(kernel, kernel_type)
+        out = cv2.erode(img, kernel, iterations=iterations)
     return out
 
 
-def closing(img, kernel=3, iterations=1, configure=False):
+def closing(img, kernel=3, iterations=1, configure=False, kernel_type=None):
     """
     Performs a dilation followed by an erosion
 
@@ -113,22 +137,21 @@ def closing(img, kernel=3, iterations=1, configure=False):
     kernel: can be int or tuple giving (width, height). If int x get kernel (x,x) for kernel
         Width and height should be positive and odd
 
+    kernel_type: Either None or cv2.MORPH_?????
+
     Returns
     -------
     out: output image
         Same size and type as img
 
     """
-    print('WARNING - This function seems to apply a small translation to the images. Needs investigating. If you are using this for something important test the Binary_Single_Circle test image and apply multiple iterations to see this behaviour.')
-    
     if configure:
         param_dict = {'kernel':[kernel,1,kernel*25,2], 'iterations':[iterations, 1, 25, 1]}
         gui = ConfigGui(img, closing, param_dict)
         out = closing(img, **gui.reduced_dict)
         gui.app.quit()
     else:
-        if type(kernel) == int:
-                kernel = (kernel, kernel)
+        kernel = get_kernel(kernel, kernel_type)
         out = cv2.morphologyEx(img, cv2.MORPH_CLOSE, kernel, iterations=iterations)
     return out
 
@@ -159,15 +182,92 @@ def opening(img, kernel=3, kernel_type=None, iterations=1, configure=False):
         out = opening(img, **gui.reduced_dict)
         gui.app.quit()
     else:
-        if type(kernel) == int:
-                kernel = (kernel, kernel)
-        if kernel_type is not None:
-            kernel = cv2.getStructuringElement(kernel_type, kernel)
-        else:
-            kernel = np.ones(kernel)
+        kernel = get_kernel(kernel, kernel_type)
         out = cv2.morphologyEx(img, cv2.MORPH_OPEN, kernel, iterations=iterations)
     return out
 
+
+_MORPH_OPS = {
+    'dilate': cv2.MORPH_DILATE,
+    'erode': cv2.MORPH_ERODE,
+    'open': cv2.MORPH_OPEN,
+    'close': cv2.MORPH_CLOSE,
+    'gradient': cv2.MORPH_GRADIENT,
+    'tophat': cv2.MORPH_TOPHAT,
+    'blackhat': cv2.MORPH_BLACKHAT,
+}
+
+
+class MorphChain:
+    """A sequence of morphological operations applied to every frame
+
+    Kernels are looked up once when the chain is created and two buffers
+    are allocated on the first frame. Each operation reads from one buffer
+    and writes into the other so no new arrays are created per frame.
+
+    Attributes
+    ----------
+    ops : list
+        [(op, kernel), (op, kernel, iterations), ...] where op is one of
+        'dilate', 'erode', 'open', 'close', 'gradient', 'tophat', 'blackhat'
+        and kernel is as for get_kernel.
+    kernel_type : None or cv2.MORPH_?????
+        shape of all the kernels in the chain
+
+    Examples
+    --------
+    | chain = MorphChain([('open', 3), ('close', 5), ('dilate', 3, 2)])
+    | for frame in readvid:
+    |     bw_img = chain.apply(threshold(frame))
+
+    """
+
+    def __init__(self, ops, kernel_type=None):
+        self.ops = []
+        for op in ops:
+            name, kernel = op[0], op[1]
+            iterations = op[2] if len(op) > 2 else 1
+            assert name in _MORPH_OPS, 'Unknown morphological operation ' + str(name)
+            self.ops.append((_MORPH_OPS[name], get_kernel(kernel, kernel_type), iterations))
+        self._buffers = None
+
+    def apply(self, img, out=None):
+        """Apply the chain to img, writing the result into out if supplied
+
+        Unless out is supplied the returned array is one of the chain's
+        buffers and is overwritten by the next call.
+        """
+        if len(self.ops) == 0:
+            return img
+        if out is not None:
+            assert np.shape(out) == np.shape(img) and out.dtype == img.dtype, 'out must be same shape and type as img'
+            assert out.flags['C_CONTIGUOUS'], 'out must be contiguous'
+        if self._buffers is None or self._buffers[0].shape != img.shape or self._buffers[0].dtype != img.dtype:
+            self._buffers = (np.empty_like(img), np.empty_like(img))
+        src = img
+        for i, (op, kernel, iterations) in enumerate(self.ops):
+            if i == len(self.ops) - 1 and out is not None:
+                dst = out
+            else:
+                dst = self._buffers[i % 2]
+            cv2.morphologyEx(src, op, kernel, dst=dst, iterations=iterations)
+            src = dst
+        return src
+
+    __call__ = apply
+
+
+def morph_chain(img, ops, kernel_type=None, out=None):
+    """Apply a sequence of morphological operations in one call
+
+    e.g morph_chain(img, [('open', 3), ('close', 5)])
+
+    See MorphChain. If processing many frames create a MorphChain once
+    and reuse it.
+    """
+    return MorphChain(ops, kernel_type=kernel_type).apply(img, out=out)
+
+
 def fill_holes(frame : np.ndarray):
     """Fill holes in a binary image
 
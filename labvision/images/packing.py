@@ -0,0 +1,221 @@
+import numpy as np
+
+__all__ = ['PackedMask', 'RLELabels', 'rle_encode', 'rle_decode', 'SegmentationStore']
+
+"""Compact storage for binary masks and label images
+
+A binary image from threshold uses a byte per pixel. PackedMask stores
+one bit per pixel. Label images from find_connected_components are int32
+per pixel but are mostly long runs of the same value, so RLELabels stores
+only the value and length of each run. SegmentationStore keeps one of
+these per frame and saves them all to a single .npz file.
+"""
+
+
+# number of set bits in each possible byte
+_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+
+class PackedMask:
+    """Binary mask stored as one bit per pixel
+
+    Attributes
+    ----------
+    shape : tuple
+        shape of the original mask
+    bits : np.ndarray
+        np.packbits of the flattened mask. Padding bits are always 0.
+
+    Examples
+    --------
+    | packed = PackedMask(threshold(img, 100))
+    | both = packed & PackedMask(other_bw_img)
+    | bw_img = both.to_array()
+
+    """
+
+    def __init__(self, mask=None, shape=None, bits=None):
+        if mask is not None:
+            mask = np.asarray(mask)
+            self.shape = mask.shape
+            self.bits = np.packbits(mask.ravel() > 0)
+        else:
+            self.shape = tuple(shape)
+            self.bits = bits
+
+    @property
+    def size(self):
+        return int(np.prod(self.shape))
+
+    @property
+    def nbytes(self):
+        return self.bits.nbytes
+
+    def to_array(self, value=255):
+        """Unpack to a uint8 mask with set pixels equal to value"""
+        flat = np.unpackbits(self.bits, count=self.size)
+        if value != 1:
+            flat *= np.uint8(value)
+        return flat.reshape(self.shape)
+
+    def count(self):
+        """Number of set pixels"""
+        return int(_POPCOUNT[self.bits].sum(dtype=np.int64))
+
+    def _check(self, other):
+        assert self.shape == other.shape, 'Masks must be the same shape'
+
+    def __and__(self, other):
+        self._check(other)
+        return PackedMask(shape=self.shape, bits=self.bits & other.bits)
+
+    def __or__(self, other):
+        self._check(other)
+        return PackedMask(shape=self.shape, bits=self.bits | other.bits)
+
+    def __xor__(self, other):
+        self._check(other)
+        return PackedMask(shape=self.shape, bits=self.bits ^ other.bits)
+
+    def __invert__(self):
+        bits = ~self.bits
+        padding = 8 * len(bits) - self.size
+        if padding:
+            bits[-1] &= np.uint8((0xFF << padding) & 0xFF)
+        return PackedMask(shape=self.shape, bits=bits)
+
+    def __eq__(self, other):
+        return isinstance(other, PackedMask) and self.shape == other.shape and np.array_equal(self.bits, other.bits)
+
+
+def rle_encode(arr):
+    """Run length encode an array in row major order
+
+    Parameters
+    ----------
+    arr : np.ndarray
+        e.g label image or binary mask
+
+    Returns
+    -------
+    values : value of each run, same dtype as arr
+    lengths : int32 length of each run
+    """
+    flat = np.asarray(arr).ravel()
+    if len(flat) == 0:
+        return flat[:0], np.zeros(0, dtype=np.int32)
+    starts = np.flatnonzero(flat[1:] != flat[:-1]) + 1
+    starts = np.concatenate(([0], starts))
+    lengths = np.diff(np.concatenate((starts, [len(flat)]))).astype(np.int32)
+    return flat[starts], lengths
+
+
+def rle_decode(shape, values, lengths):
+    """Inverse of rle_encode"""
+    return np.repeat(values, lengths).reshape(shape)
+
+
+class RLELabels:
+    """Label image or mask stored as runs of equal values
+
+    Attributes
+    ----------
+    shape : tuple
+        shape of the original array
+    values : np.ndarray
+        value of each run
+    lengths : np.ndarray
+        length of each run
+    """
+
+    def __init__(self, labels=None, shape=None, values=None, lengths=None):
+        if labels is not None:
+            self.shape = np.shape(labels)
+            self.values, self.lengths = rle_encode(labels)
+        else:
+            self.shape = tuple(shape)
+            self.values = values
+            self.lengths = lengths
+
+    @property
+    def nbytes(self):
+        return self.values.nbytes + self.lengths.nbytes
+
+    def to_array(self):
+        return rle_decode(self.shape, self.values, self.lengths)
+
+    def select(self, label):
+        """PackedMask of pixels equal to label"""
+        return PackedMask(self.to_array() == label)
+
+
+class SegmentationStore:
+    """Per frame masks or label images for a whole video
+
+    Each added frame is stored as a PackedMask (method='packed') or
+    RLELabels (method='rle'). save() writes all frames into one .npz file
+    as concatenated arrays plus offsets.
+
+    Examples
+    --------
+    | store = SegmentationStore(method='packed')
+    | for frame in readvid:
+    |     store.append(threshold(frame, 100))
+    | store.save('masks.npz')
+    | store = SegmentationStore.load('masks.npz')
+    | bw_img = store[10]
+
+    """
+
+    def __init__(self, method: str = 'packed'):
+        assert method in ('packed', 'rle'), 'method must be packed or rle'
+        self.method = method
+        self.frames = []
+
+    def append(self, arr):
+        if self.method == 'packed':
+            self.frames.append(PackedMask(arr))
+        else:
+            self.frames.append(RLELabels(arr))
+
+    def __len__(self):
+        return len(self.frames)
+
+    def __getitem__(self, i):
+        """Decoded array for frame i"""
+        return self.frames[i].to_array()
+
+    @property
+    def nbytes(self):
+        return sum(frame.nbytes for frame in self.frames)
+
+    def save(self, filename: str):
+        shapes = np.array([frame.shape for frame in self.frames], dtype=np.int64)
+        if self.method == 'packed':
+            parts = {'bits': [frame.bits for frame in self.frames]}
+        else:
+            parts = {'values': [frame.values for frame in self.frames],
+                     'lengths': [frame.lengths for frame in self.frames]}
+        arrays = {}
+        for name, items in parts.items():
+            arrays[name] = np.concatenate(items) if items else np.zeros(0)
+            arrays[name + '_offsets'] = np.cumsum([0] + [len(item) for item in items])
+        np.savez(filename, method=self.method, shapes=shapes, **arrays)
+
+    @classmethod
+    def load(cls, filename: str):
+        with np.load(filename) as data:
+            store = cls(method=str(data['method']))
+            shapes = data['shapes']
+            if store.method == 'packed':
+                bits, offsets = data['bits'], data['bits_offsets']
+                for i, shape in enumerate(shapes):
+                    store.frames.append(PackedMask(shape=shape, bits=bits[offsets[i]:offsets[i + 1]]))
+            else:
+                values, v_offsets = data['values'], data['values_offsets']
+                lengths, l_offsets = data['lengths'], data['lengths_offsets']
+                for i, shape in enumerate(shapes):
+                    store.frames.append(RLELabels(shape=shape,
+                                                  values=values[v_offsets[i]:v_offsets[i + 1]],
+                                                  lengths=lengths[l_offsets[i]:l_offsets[i + 1]]))
+        return store
@@ -0,0 +1,113 @@
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+__all__ = ['sweep', 'expand_param_dict']
+
+
+def expand_param_dict(param_grid: dict):
+    """Turn a param_dict into lists of values to try
+
+    Uses the same format as the param_dict passed to ConfigGui by
+    functions with configure=True i.e {'name': [initial, min, max, step]}.
+    The values min, min+step, ... max are tried. If instead of a list you
+    supply a tuple, range or array those exact values are used.
+
+    Example
+    -------
+    expand_param_dict({'value': [100, 0, 255, 5], 'invert': (0, 1)})
+
+    Returns
+    -------
+    dict of name : list of values
+    """
+    values = {}
+    for name, spec in param_grid.items():
+        if isinstance(spec, list):
+            assert len(spec) == 4, 'param_dict entries should look like [initial, min, max, step]'
+            _, start, stop, step = spec
+            n = int(np.floor((stop - start) / step + 1e-9)) + 1
+            vals = start + step * np.arange(n)
+            if all(float(v).is_integer() for v in (start, step)):
+                vals = vals.astype(int)
+            values[name] = vals.tolist()
+        else:
+            values[name] = list(spec)
+    return values
+
+
+_worker_frames = None
+
+
+def _init_worker(frames):
+    global _worker_frames
+    _worker_frames = frames
+
+
+def _evaluate(func, params, score, fixed):
+    return [score(func(frame, **params, **fixed), frame) for frame in _worker_frames]
+
+
+def _field_dtype(values):
+    """dtype of a results table field. Non scalar values e.g kernel=(3, 3) are stored as objects."""
+    if all(np.ndim(value) == 0 for value in values):
+        return np.asarray(values).dtype
+    return object
+
+
+def sweep(func, param_grid: dict, frames, score, fixed=None, workers=None):
+    """Headless parameter sweep over sample frames
+
+    Evaluates func on every frame for every combination of parameters in
+    param_grid using a pool of processes. This is the non interactive
+    counterpart of configure=True, so it can run without a display.
+
+    Parameters
+    ----------
+    func : function
+        called as func(frame, **params) e.g threshold, adaptive_threshold,
+        find_circles, dilate. Must be importable (not a lambda) to be sent
+        to the worker processes.
+    param_grid : dict
+        see expand_param_dict. e.g {'value': [100, 0, 255, 5]}
+    frames : list of np.ndarray
+        sample frames
+    score : function
+        called as score(output, frame) returning a float. Higher is better.
+        Must also be importable.
+    fixed : dict, optional
+        extra keyword arguments passed unchanged to func
+    workers : int, optional
+        number of processes. None uses all cpus, 1 runs in this process.
+
+    Returns
+    -------
+    table : np.ndarray
+        structured array with one row per parameter combination sorted
+        from best to worst. Has a field for each parameter, 'score' the mean
+        score over frames and 'frame_scores' the score for each frame.
+    """
+    fixed = {} if fixed is None else fixed
+    frames = list(frames)
+    values = expand_param_dict(param_grid)
+    names = list(values)
+    combos = [dict(zip(names, combo)) for combo in itertools.product(*values.values())]
+    dtype = [(name, _field_dtype(values[name])) for name in names]
+    dtype += [('score', np.float64), ('frame_scores', np.float64, (len(frames),))]
+
+    if workers == 1:
+        _init_worker(frames)
+        scores = [_evaluate(func, params, score, fixed) for params in combos]
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(frames,)) as pool:
+            futures = [pool.submit(_evaluate, func, params, score, fixed) for params in combos]
+            scores = [future.result() for future in futures]
+
+    table = np.empty(len(combos), dtype=dtype)
+    for row, (params, frame_scores) in enumerate(zip(combos, scores)):
+        for name in names:
+            table[name][row] = params[name]
+        table['frame_scores'][row] = frame_scores
+        table['score'][row] = np.mean(frame_scores)
+    return table[np.argsort(-table['score'], kind='stable')]
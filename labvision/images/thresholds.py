@@ -1,13 +1,19 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+
 import cv2
 import numpy as np
 
 from qtwidgets.config import ConfigGui
 
 from labvision.images.colours import bgr_to_gray, gray_to_bgr
+from labvision.images.difference import balanced_absdiff
 
 __all__ = [
     'threshold',
     'adaptive_threshold',
+    'threshold_stack',
+    'adaptive_threshold_stack',
 ]
 
 
@@ -70,9 +76,109 @@ def adaptive_threshold(im, block_size=10, constant=5, invert=False, configure=Fa
     return out
 
 
+def _map_frames(func, num_frames, workers):
+    """Call func(i) for each frame index, on a thread pool if workers > 1.
+    OpenCV releases the GIL so threads give a real speed up."""
+    if workers is None:
+        workers = min(os.cpu_count() or 1, num_frames)
+    if workers <= 1 or num_frames < 2:
+        return [func(i) for i in range(num_frames)]
+    with ThreadPoolExecutor(workers) as pool:
+        return list(pool.map(func, range(num_frames)))
+
+
+def _stack_out(stack, out):
+    assert np.ndim(stack) == 3, 'stack should have shape (N,H,W)'
+    if out is None:
+        out = np.empty(np.shape(stack), dtype=np.uint8)
+    assert np.shape(out) == np.shape(stack) and out.dtype == np.uint8, 'out must be uint8 and same shape as stack'
+    assert out.flags['C_CONTIGUOUS'], 'out must be contiguous'
+    return out
+
+
+def threshold_stack(stack, value=None, invert=False, out=None, workers=None):
+    """
+    Thresholds every frame in a (N,H,W) stack
+
+    Same as threshold but for a block of frames. Frames are processed in
+    parallel on a pool of threads.
+
+    Parameters
+    ----------
+    stack: (N,H,W) array of grayscale frames
+
+    value: threshold value. If None Otsu's method picks a value for each frame.
+
+    invert: if True pixels above the threshold are set to black
+
+    out: optional (N,H,W) uint8 array the result is written into
+
+    workers: number of threads. None uses one per cpu, 1 runs serially.
+
+    Returns
+    -------
+    out: (N,H,W) binary stack
+
+    values: (N,) array of the threshold used for each frame
+    """
+    out = _stack_out(stack, out)
+    mode = int(invert)
+    if value is None:
+        mode += cv2.THRESH_OTSU
+        value = 0
+
+    def process(i):
+        return cv2.threshold(stack[i], value, 255, mode, dst=out[i])[0]
+
+    values = np.array(_map_frames(process, len(stack), workers))
+    return out, values
+
+
+def adaptive_threshold_stack(stack, block_size=10, constant=5, invert=False, out=None, workers=None):
+    """
+    Performs an adaptive threshold on every frame in a (N,H,W) stack
+
+    See adaptive_threshold. Frames are processed in parallel on a pool of
+    threads.
+
+    Parameters
+    ----------
+    stack: (N,H,W) array of grayscale frames
+
+    block_size: the size of the neighbourhood area
+
+    constant: subtracted from the weighted sum
+
+    out: optional (N,H,W) uint8 array the result is written into
+
+    workers: number of threads. None uses one per cpu, 1 runs serially.
+
+    Returns
+    -------
+    out: (N,H,W) binary stack
+    """
+    out = _stack_out(stack, out)
+
+    def process(i):
+        cv2.adaptiveThreshold(
+            stack[i],
+            255,
+            cv2.ADAPTIVE_THRESH_GAUSSIAN_C,
+            int(invert),
+            block_size,
+            constant,
+            dst=out[i]
+        )
+
+    _map_frames(process, len(stack), workers)
+    return out
+
 
 def absolute_diff(img, value, normalise=False, configure=False):
     """Returns an image which is the absolute difference between value and pixel intensity
+
+    See labvision.images.difference for versions that write into out= and
+    work on stacks of frames.
     """
     if configure:
         param_dict = {'value':[100,1,255,1], 'normalise':[0, 0, 1, 1]}
@@ -80,15 +186,7 @@ def absolute_diff(img, value, normalise=False, configure=False):
         out = absolute_diff(img, **gui.reduced_dict)
         gui.app.quit()
     else:
-        subtract_frame = value*np.ones(np.shape(img), dtype=np.uint8)  
-        frame1 = cv2.subtract(subtract_frame, img)
-        frame1 = cv2.normalize(frame1, frame1 ,0,255,cv2.NORM_MINMAX)
-        frame2 = cv2.subtract(img, subtract_frame)
-        frame2 = cv2.normalize(frame2, frame2,0,255,cv2.NORM_MINMAX)
-        out = cv2.add(frame1, frame2)
-
-        if normalise == True:
-            out = cv2.normalize(out, None, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX)
+        out = balanced_absdiff(img, value, normalise=normalise)
 
     return out
 
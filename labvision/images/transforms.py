@@ -1,16 +1,24 @@
+from functools import lru_cache
+
 import cv2
 import numpy as np
 
 from qtwidgets.config import ConfigGui
 
 from labvision.images.colours import bgr_to_gray, gray_to_bgr
+from labvision.images.difference import balanced_absdiff
 
 __all__ = [
     'brightness_contrast',
     'gamma',
     'watershed',
     'distance',
-    'absolute_diff'
+    'absolute_diff',
+    'gamma_lut',
+    'brightness_contrast_lut',
+    'threshold_lut',
+    'lut_pipeline',
+    'apply_lut'
 ]
 
 def brightness_contrast(img, brightness=0, contrast=0, configure=False):
@@ -61,17 +69,84 @@ def gamma(gray_img, gamma=1.0, configure=False):
         gamma_img = gamma(gray_img, **gui.reduced_dict)
         gui.app.quit()
     else:
-        # build a lookup table mapping the pixel values [0, 255] to
-        # their adjusted gamma values
-        if gamma == 0:
-            gamma = 0.000001
-        invGamma = 1.0 / gamma
+        gamma_img = cv2.LUT(gray_img, gamma_lut(gamma))
+    return gamma_img
 
-        table = np.array([((i / 255.0) ** invGamma) *
-                        255 for i in np.arange(0, 256)]).astype("uint8")
+"""Lookup tables
+
+Point transforms on 8 bit images can be written as a 256 entry lookup
+table. Tables are cached by their parameters so applying the same transform
+to every frame of a video only builds the table once. The cached arrays are
+read only.
+"""
+
+@lru_cache(maxsize=128)
+def gamma_lut(gamma=1.0):
+    """256 entry table mapping pixel values [0, 255] to their gamma adjusted values"""
+    if gamma == 0:
+        gamma = 0.000001
+    table = ((np.arange(256) / 255.0) ** (1.0 / gamma) * 255).astype(np.uint8)
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=128)
+def brightness_contrast_lut(brightness=0, contrast=0):
+    """256 entry table equivalent to brightness_contrast on a uint8 image"""
+    table = np.abs(contrast * np.arange(256, dtype=np.float64) + brightness)
+    table = np.clip(np.rint(table), 0, 255).astype(np.uint8)
+    table.flags.writeable = False
+    return table
+
+
+@lru_cache(maxsize=128)
+def threshold_lut(value=127, invert=False):
+    """256 entry table equivalent to a binary threshold at value"""
+    table = np.where(np.arange(256) > value, 255, 0).astype(np.uint8)
+    if invert:
+        table = 255 - table
+    table.flags.writeable = False
+    return table
+
+
+_LUTS = {
+    'gamma': gamma_lut,
+    'brightness_contrast': brightness_contrast_lut,
+    'threshold': threshold_lut,
+}
+
+
+def lut_pipeline(steps):
+    """Compose several point transforms into one lookup table
+
+    Example
+    -------
+    table = lut_pipeline([('gamma', {'gamma': 1.5}),
+                          ('brightness_contrast', {'brightness': 10, 'contrast': 1.2}),
+                          ('threshold', {'value': 100})])
+    for frame in readvid:
+        bw_img = apply_lut(frame, table)
+
+    Parameters
+    ----------
+    steps : list of (name, params) applied in order. name is one of
+        'gamma', 'brightness_contrast' or 'threshold' and params are the
+        keyword arguments of the matching function.
+
+    Returns
+    -------
+    256 entry uint8 lookup table
+    """
+    table = np.arange(256, dtype=np.uint8)
+    for name, params in steps:
+        table = _LUTS[name](**params)[table]
+    return table
+
+
+def apply_lut(img, table, out=None):
+    """Apply a 256 entry lookup table to a uint8 image with a single cv2.LUT call"""
+    return cv2.LUT(img, table, dst=out)
 
-        gamma_img = cv2.LUT(gray_img, table)
-    return gamma_img
 
 def distance(bw_img, normalise=True):
     """
@@ -103,6 +178,9 @@ def distance(bw_img, normalise=True):
 
 def absolute_diff(img, value=0, normalise=False, configure=False):
     """Returns an image which is the absolute difference between value and pixel intensity
+
+    See labvision.images.difference for versions that write into out= and
+    work on stacks of frames.
     """
     if configure:
         param_dict = {'value':[100,1,255,1], 'normalise':[0, 0, 1, 1]}
@@ -110,15 +188,7 @@ def absolute_diff(img, value=0, normalise=False, configure=False):
         img = absolute_diff(img, **gui.reduced_dict)
         gui.app.quit()
     else:
-        subtract_frame = value*np.ones(np.shape(img), dtype=np.uint8)  
-        frame1 = cv2.subtract(subtract_frame, img)
-        frame1 = cv2.normalize(frame1, frame1 ,0,255,cv2.NORM_MINMAX)
-        frame2 = cv2.subtract(img, subtract_frame)
-        frame2 = cv2.normalize(frame2, frame2,0,255,cv2.NORM_MINMAX)
-        img = cv2.add(frame1, frame2)
-
-        if normalise == True:
-            img = cv2.normalize(img, None, alpha=0, beta=255, norm_type=cv2.NORM_MINMAX)
+        img = balanced_absdiff(img, value, normalise=normalise)
 
     return img
 
@@ -4,8 +4,14 @@ import numpy as np
 from slicerator import Slicerator
 from filehandling import BatchProcess, smart_number_sort
 from labvision import images
+from labvision.custom_exceptions import ImageSequenceError
 from typing import Optional, Tuple
 import datetime
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from .cache import *
+from .filters import *
 
 IMG_FILE_EXT = ('.png', '.jpg', '.tiff', '.JPG', '.PNG', '.TIFF')
 VID_FILE_EXT = ('.MP4', '.mp4', '.m4v', '.avi', '.mkv', '.webm')
@@ -14,7 +20,7 @@ VID_FILE_EXT = ('.MP4', '.mp4', '.m4v', '.avi', '.mkv', '.webm')
 FrameRange = Tuple[int, Optional[int], int]
 
 
-__all__ = ['ReadVideo', 'WriteVideo', 'video_to_imgs', 'imgs_to_video']
+__all__ = ['ReadVideo', 'WriteVideo', 'WriteImgSeq', 'video_to_imgs', 'imgs_to_video', 'ResultCache', 'TemporalFilter', 'ChangeDetector']
 
 
 class _ReadImgSeq:
@@ -416,6 +422,113 @@ class WriteVideo:
         self.close()
 
 
+class WriteImgSeq:
+    """WriteImgSeq writes frames to a numbered sequence of image files
+
+    Has the same interface as WriteVideo. Frames are encoded on a pool of
+    background threads so add_frame returns as soon as the frame is
+    queued. If more than max_queue frames are waiting add_frame blocks
+    until one has been written, which stops memory growing without limit.
+
+    Attributes
+    ----------
+    filename : String
+        Full path and filename stub e.g '/path/frame_'. Files are named
+        stub + zero padded number + ext e.g frame_00012.png
+    ext : string
+        '.png', '.jpg', '.tiff'
+    frame_size : tuple
+        Optional np.shape that every frame must have. If frame is supplied instead its shape is used.
+    num_figs : int
+        number of digits in the frame number
+    workers : int
+        number of encoding threads
+    max_queue : int
+        number of frames that can be waiting to be written
+    png_compression : int
+        0-9. Lower is faster but files are bigger
+    jpeg_quality : int
+        0-100
+    frame_num : int
+        number given to the next frame added
+
+    Examples
+    --------
+    | with WriteImgSeq('/path/frame_', ext='.png', png_compression=1) as writeseq:
+    |    writeseq.add_frame(img)
+
+    """
+
+    def __init__(self, filename, ext='.png', frame_size=None, frame=None, num_figs=5, workers=2,
+                 max_queue=16, png_compression=None, jpeg_quality=None, start=0):
+        assert ext in IMG_FILE_EXT, 'Extension not recognised'
+        self.filename = filename
+        self.ext = ext
+        self.frame_size = np.shape(frame) if frame_size is None and frame is not None else frame_size
+        self.num_figs = num_figs
+        self.frame_num = start
+        self.params = []
+        if png_compression is not None:
+            self.params += [cv2.IMWRITE_PNG_COMPRESSION, int(png_compression)]
+        if jpeg_quality is not None:
+            self.params += [cv2.IMWRITE_JPEG_QUALITY, int(jpeg_quality)]
+
+        self._pool = ThreadPoolExecutor(workers)
+        self._slots = threading.BoundedSemaphore(max_queue)
+        self._errors = []
+        self.filenames = []
+
+    def add_frame(self, im):
+        """
+        Queue a frame to be written. The frame is copied so the caller can reuse it.
+
+        :param im: Image
+        :return: filename the frame will be written to
+        """
+        self._raise_errors()
+        if self.frame_size is not None:
+            assert np.shape(im) == tuple(self.frame_size), "Added frame is wrong shape"
+        filename = self.filename + suffix_generator(self.frame_num, num_figs=self.num_figs) + self.ext
+        self.frame_num += 1
+        self.filenames.append(filename)
+        self._slots.acquire()
+        try:
+            self._pool.submit(self._write, self.frame_num - 1, filename, im.copy())
+        except Exception:
+            self._slots.release()
+            raise
+        return filename
+
+    def _write(self, frame_num, filename, im):
+        try:
+            if not cv2.imwrite(filename, im, self.params):
+                self._errors.append((frame_num, filename, 'could not write image'))
+        except Exception as e:
+            self._errors.append((frame_num, filename, str(e)))
+        finally:
+            self._slots.release()
+
+    def _raise_errors(self):
+        """Raise ImageSequenceError for any frames that failed, in frame order"""
+        if self._errors:
+            errors, self._errors = self._errors, []
+            raise ImageSequenceError(sorted(errors))
+
+    def close(self):
+        """
+        Wait for all queued frames to be written. Raises ImageSequenceError
+        listing (frame_num, filename, message) for any that failed.
+        """
+        self._pool.shutdown(wait=True)
+        self._raise_errors()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
 def suffix_generator(i, num_figs=5):
     """Creates a number suffix as string
     e.g 00005"""
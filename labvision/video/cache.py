@@ -0,0 +1,206 @@
+import os
+import hashlib
+import pickle
+import tempfile
+import numpy as np
+
+__all__ = ['ResultCache']
+
+
+_MISSING = object()
+
+
+def _func_id(func):
+    if func is None:
+        return None
+    return (getattr(func, '__module__', ''), getattr(func, '__qualname__', repr(func)))
+
+
+def _video_id(readvid):
+    """Identify a video by its path, size, modification time and read mode.
+
+    Image sequences given as a wildcard pattern can't be stat'd so are
+    identified by the pattern alone. The read mode includes any
+    return_function, since that changes the frames ReadVideo returns.
+    """
+    filename = os.path.abspath(readvid.filename)
+    try:
+        stat = os.stat(filename)
+        ident = (filename, stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        ident = (filename,)
+    return repr(ident + (readvid.grayscale, _func_id(getattr(readvid, 'return_func', None))))
+
+
+def _param_repr(params):
+    """Stable string form of a parameter dict. Arrays are hashed by content."""
+    items = []
+    for name in sorted(params):
+        value = params[name]
+        if isinstance(value, np.ndarray):
+            value = hashlib.sha1(value.tobytes()).hexdigest() + str(value.shape)
+        items.append((name, repr(value)))
+    return repr(items)
+
+
+class ResultCache:
+    """Disk backed cache of pipeline stage results
+
+    Results are keyed on (video, frame number, stage, parameters). The key
+    of each stage includes the names and parameters of all the stages
+    before it, so changing a parameter only invalidates that stage and
+    the stages downstream of it. When the cache exceeds max_bytes the
+    least recently used results are deleted.
+
+    Attributes
+    ----------
+    cache_dir : str
+        folder where results are stored. Created if it doesn't exist.
+    max_bytes : int
+        maximum total size of the stored results
+
+    Examples
+    --------
+    | cache = ResultCache('/tmp/labvision_cache', max_bytes=5e9)
+    | stages = [(gaussian_blur, {'kernel': (5, 5)}),
+    |           (threshold, {'value': 120})]
+    | for n in range(readvid.num_frames):
+    |     bw_img = cache.run(readvid, n, stages)
+
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: float = 2 ** 30):
+        self.cache_dir = cache_dir
+        self.max_bytes = int(max_bytes)
+        os.makedirs(cache_dir, exist_ok=True)
+        self._index = {}
+        for filename in os.listdir(cache_dir):
+            key, ext = os.path.splitext(filename)
+            if ext == '.tmp':
+                # left behind by a put that was interrupted
+                os.remove(os.path.join(cache_dir, filename))
+            elif ext in ('.npy', '.pkl'):
+                stat = os.stat(os.path.join(cache_dir, filename))
+                self._index[key] = [filename, stat.st_size, stat.st_mtime]
+        self.total_bytes = sum(entry[1] for entry in self._index.values())
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, readvid, frame_num: int, stages):
+        """Key for the last of a chain of stages applied to one frame
+
+        stages is a list of (func, params) tuples.
+        """
+        chain = [_func_id(func) + (_param_repr(params),) for func, params in stages]
+        ident = repr((_video_id(readvid), int(frame_num), chain))
+        return hashlib.sha1(ident.encode()).hexdigest()
+
+    def get(self, key: str, default=None):
+        """Returns the stored result or default if key is not in the cache"""
+        entry = self._index.get(key)
+        if entry is None:
+            self.misses += 1
+            return default
+        path = os.path.join(self.cache_dir, entry[0])
+        try:
+            if entry[0].endswith('.npy'):
+                result = np.load(path, allow_pickle=False)
+            else:
+                with open(path, 'rb') as f:
+                    result = pickle.load(f)
+        except (OSError, ValueError, EOFError, pickle.UnpicklingError):
+            # missing or corrupt file
+            self._forget(key)
+            self.misses += 1
+            return default
+        os.utime(path)
+        entry[2] = os.stat(path).st_mtime
+        self.hits += 1
+        return result
+
+    def put(self, key: str, result):
+        """Store a result. numpy arrays are saved as .npy anything else is pickled."""
+        if key in self._index:
+            self._forget(key)
+        is_array = isinstance(result, np.ndarray) and result.dtype != object
+        filename = key + ('.npy' if is_array else '.pkl')
+        # write to a temporary file and move it into place so an
+        # interrupted put never leaves a truncated result in the cache
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                if is_array:
+                    np.save(f, result, allow_pickle=False)
+                else:
+                    pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, os.path.join(self.cache_dir, filename))
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        stat = os.stat(os.path.join(self.cache_dir, filename))
+        self._index[key] = [filename, stat.st_size, stat.st_mtime]
+        self.total_bytes += stat.st_size
+        self._evict()
+
+    def run(self, readvid, frame_num: int, stages):
+        """Run a chain of stages on a frame reusing any cached results
+
+        Parameters
+        ----------
+        readvid : ReadVideo
+            video the frame is read from if nothing is cached
+        frame_num : int
+            index of the frame
+        stages : list
+            [(func, params), ...] each func is called as func(img, **params)
+
+        Returns
+        -------
+        Output of the last stage
+        """
+        keys = [self.key(readvid, frame_num, stages[:i + 1]) for i in range(len(stages))]
+
+        start = 0
+        result = None
+        for i in reversed(range(len(stages))):
+            result = self.get(keys[i], _MISSING)
+            if result is not _MISSING:
+                start = i + 1
+                break
+        if start == 0:
+            result = readvid.read_frame(frame_num)
+
+        for i in range(start, len(stages)):
+            func, params = stages[i]
+            result = func(result, **params)
+            self.put(keys[i], result)
+        return result
+
+    def clear(self):
+        """Delete everything in the cache"""
+        for key in list(self._index):
+            self._forget(key)
+
+    def _forget(self, key):
+        filename, size, _ = self._index.pop(key)
+        self.total_bytes -= size
+        try:
+            os.remove(os.path.join(self.cache_dir, filename))
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Remove least recently used results until under max_bytes"""
+        if self.total_bytes <= self.max_bytes:
+            return
+        by_age = sorted(self._index, key=lambda k: self._index[k][2])
+        for key in by_age:
+            if self.total_bytes <= self.max_bytes:
+                break
+            self._forget(key)
+
+    def __len__(self):
+        return len(self._index)
+
+    def __contains__(self, key):
+        return key in self._index
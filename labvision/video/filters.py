@@ -0,0 +1,245 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+import numpy as np
+
+__all__ = ['TemporalFilter', 'ChangeDetector']
+
+
+class TemporalFilter:
+    """Sliding window median or mean across frames
+
+    Keeps the last window frames in a single preallocated (window, H, W)
+    ring buffer so frames are only read once. The mean is updated
+    incrementally by adding the new frame and subtracting the one it
+    replaces. The median is recalculated each frame and can be split into
+    horizontal tiles processed on separate threads.
+
+    Until window frames have been seen the filter uses those available.
+
+    Attributes
+    ----------
+    source : iterable
+        ReadVideo instance or any iterable of frames
+    window : int
+        number of frames in the window e.g 5
+    method : str
+        'median' or 'mean'
+    tiles : int
+        number of horizontal strips the median is split into. Each strip
+        is processed on its own thread.
+
+    Examples
+    --------
+    | readvid = ReadVideo(filename, grayscale=True)
+    | for img in TemporalFilter(readvid, window=5, tiles=4):
+    |     DoStuff(img)
+
+    """
+
+    def __init__(self, source=None, window: int = 5, method: str = 'median', tiles: int = 1):
+        assert method in ('median', 'mean'), 'method must be median or mean'
+        assert window >= 1, 'window must be at least 1'
+        self.source = source
+        self.window = int(window)
+        self.method = method
+        self.tiles = int(tiles)
+        self._buffer = None
+        self._pool = ThreadPoolExecutor(self.tiles) if self.tiles > 1 else None
+
+    def _setup(self, frame):
+        self._buffer = np.empty((self.window,) + frame.shape, dtype=frame.dtype)
+        self._count = 0
+        self._index = 0
+        self._work = np.empty(frame.shape, dtype=np.float32)
+        if self.method == 'mean':
+            sum_dtype = np.int64 if np.issubdtype(frame.dtype, np.integer) else np.float64
+            self._sum = np.zeros(frame.shape, dtype=sum_dtype)
+
+    def reset(self):
+        """Empty the window"""
+        self._buffer = None
+
+    def update(self, frame: np.ndarray, out=None):
+        """Add a frame to the window and return the filtered frame
+
+        Parameters
+        ----------
+        frame : np.ndarray
+            next frame. Must have same shape and dtype as previous frames.
+        out : np.ndarray, optional
+            array to write the result into
+
+        Returns
+        -------
+        filtered frame with same shape and dtype as frame
+        """
+        if self._buffer is None:
+            self._setup(frame)
+        assert frame.shape == self._buffer.shape[1:], 'Frame is wrong shape'
+
+        slot = self._buffer[self._index]
+        if self.method == 'mean':
+            if self._count == self.window:
+                self._sum -= slot
+            self._sum += frame
+        slot[...] = frame
+        self._index = (self._index + 1) % self.window
+        self._count = min(self._count + 1, self.window)
+
+        if self.method == 'mean':
+            np.divide(self._sum, self._count, out=self._work)
+        else:
+            self._median()
+
+        if out is None:
+            out = np.empty(frame.shape, dtype=frame.dtype)
+        if np.issubdtype(frame.dtype, np.integer):
+            np.rint(self._work, out=self._work)
+        np.copyto(out, self._work, casting='unsafe')
+        return out
+
+    def _median(self):
+        frames = self._buffer[:self._count]
+        if self._pool is None:
+            np.median(frames, axis=0, out=self._work)
+            return
+        bounds = np.linspace(0, frames.shape[1], self.tiles + 1).astype(int)
+
+        def median_tile(i):
+            rows = slice(bounds[i], bounds[i + 1])
+            np.median(frames[:, rows], axis=0, out=self._work[rows])
+
+        list(self._pool.map(median_tile, range(self.tiles)))
+
+    def close(self):
+        """Shut down the thread pool"""
+        if self._pool is not None:
+            self._pool.shutdown()
+
+    def __iter__(self):
+        for frame in self.source:
+            if frame is None:
+                break
+            yield self.update(frame)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+
+class ChangeDetector:
+    """Skip frames where nothing has changed
+
+    Each frame is shrunk and compared with the last frame that was kept.
+    Only frames that differ by more than threshold are yielded, so long
+    stretches of a recording where nothing happens are skipped cheaply.
+
+    Attributes
+    ----------
+    source : iterable
+        ReadVideo instance or any iterable of frames
+    threshold : float
+        'absdiff' - mean absolute difference in grey levels (0-255).
+        'histogram' - Bhattacharyya distance between histograms (0-1).
+    method : str
+        'absdiff' or 'histogram'
+    scale : int
+        factor by which frames are downsampled before comparing
+    return_index : bool
+        if True yield (index, frame) where index counts frames read from
+        source
+    num_seen : int
+        frames read so far
+    num_kept : int
+        frames yielded so far
+    kept : list
+        indices of the frames yielded
+
+    Examples
+    --------
+    | detector = ChangeDetector(ReadVideo(filename), threshold=2)
+    | for img in detector:
+    |     DoStuff(img)
+    | print(detector.stats)
+
+    """
+
+    def __init__(self, source=None, threshold: float = 2.0, method: str = 'absdiff', scale: int = 8, return_index: bool = False):
+        assert method in ('absdiff', 'histogram'), 'method must be absdiff or histogram'
+        self.source = source
+        self.threshold = threshold
+        self.method = method
+        self.scale = int(scale)
+        self.return_index = return_index
+        self.reset()
+
+    def reset(self):
+        """Forget the reference frame and stats"""
+        self._reference = None
+        self.num_seen = 0
+        self.num_kept = 0
+        self.kept = []
+
+    def _signature(self, frame):
+        original = frame
+        if frame.ndim == 3:
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if self.scale > 1:
+            h, w = frame.shape[:2]
+            frame = cv2.resize(frame, (max(w // self.scale, 1), max(h // self.scale, 1)),
+                               interpolation=cv2.INTER_AREA)
+        if self.method == 'histogram':
+            hist = cv2.calcHist([frame], [0], None, [64], [0, 256])
+            return cv2.normalize(hist, hist)
+        return frame.copy() if frame is original else frame
+
+    def difference(self, frame: np.ndarray):
+        """Difference between frame and the last kept frame"""
+        signature = self._signature(frame)
+        if self._reference is None:
+            return np.inf, signature
+        if self.method == 'histogram':
+            diff = cv2.compareHist(self._reference, signature, cv2.HISTCMP_BHATTACHARYYA)
+        else:
+            diff = cv2.norm(self._reference, signature, cv2.NORM_L1) / signature.size
+        return diff, signature
+
+    def check(self, frame: np.ndarray):
+        """Returns True if frame has changed enough to keep.
+
+        Kept frames become the new reference.
+        """
+        diff, signature = self.difference(frame)
+        index = self.num_seen
+        self.num_seen += 1
+        if diff > self.threshold:
+            self._reference = signature
+            self.num_kept += 1
+            self.kept.append(index)
+            return True
+        return False
+
+    @property
+    def num_skipped(self):
+        return self.num_seen - self.num_kept
+
+    @property
+    def stats(self):
+        """dict summarising how many frames were skipped"""
+        return {'seen': self.num_seen,
+                'kept': self.num_kept,
+                'skipped': self.num_skipped,
+                'skipped_fraction': self.num_skipped / self.num_seen if self.num_seen else 0.0}
+
+    def __iter__(self):
+        for frame in self.source:
+            if frame is None:
+                break
+            if self.check(frame):
+                if self.return_index:
+                    yield self.kept[-1], frame
+                else:
+                    yield frame
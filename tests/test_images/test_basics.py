@@ -2,7 +2,8 @@ import numpy as np
 import os
 import pytest
 
-from labvision.images.basics import write_img, read_img
+from labvision.images.basics import write_img, read_img, read_imgs, write_imgs, _fit_to_window, _LatestFrame
+from labvision.custom_exceptions import ImageSequenceError
 from tests import DATA_DIR
 
 
@@ -32,5 +33,38 @@ def test_write_img_exception_empty_img():
         write_img(np.zeros(0),filepath)
 
 
+def test_write_read_imgs(tmp_path):
+    """Test a stack written with write_imgs is read back by read_imgs"""
+    stack = np.random.default_rng(0).integers(0, 255, (5, 20, 30), dtype=np.uint8)
+    filenames = write_imgs(stack, os.path.join(tmp_path, 'img{:03d}.png'), workers=2, png_compression=1)
+    assert os.path.basename(filenames[4]) == 'img004.png'
+    out = np.zeros_like(stack)
+    read_imgs(filenames, grayscale=True, workers=2, out=out)
+    assert np.array_equal(out, stack)
 
 
+def test_read_imgs_reports_errors_in_order(tmp_path):
+    """Test every missing file is reported with its index"""
+    filepath = os.path.join(DATA_DIR, "jpgs/SampleImage.jpg")
+    missing = [os.path.join(tmp_path, name) for name in ('a.png', 'b.png')]
+    with pytest.raises(ImageSequenceError) as e:
+        read_imgs([filepath, missing[0], filepath, missing[1]])
+    assert [error[0] for error in e.value.errors] == [1, 3]
+
+
+def test_fit_to_window_keeps_aspect():
+    """Test large frames are shrunk to fit the window without stretching"""
+    img = np.zeros((100, 400, 3), dtype=np.uint8)
+    assert np.shape(_fit_to_window(img, (200, 200))) == (50, 200, 3)
+    assert np.shape(_fit_to_window(img.transpose(1, 0, 2), (200, 200))) == (200, 50, 3)
+    assert _fit_to_window(img, (800, 800)) is img
+
+
+def test_latest_frame_drops_stale_frames():
+    """Test only the newest frame is taken and the counts used by fps"""
+    frames = _LatestFrame(np.zeros((2, 2), dtype=np.uint8))
+    for i in range(3):
+        frames.put(np.full((2, 2), i, dtype=np.uint8))
+    assert frames.take()[0, 0] == 2
+    assert frames.take() is None
+    assert (frames.num_produced, frames.num_displayed) == (3, 1)
@@ -1,6 +1,7 @@
-from labvision.images.contours import center_of_mass, contour_to_xy, cut_out_object, find_contours, contour_props, bounding_rectangle, rotated_bounding_rectangle, sort_contours
+from labvision.images.contours import center_of_mass, contour_to_xy, cut_out_object, find_contours, contour_props, bounding_rectangle, rotated_bounding_rectangle, sort_contours, PackedContours, contours_props, contour_areas, select_contours, polygon, polygon_dist, fit_polygon, fit_polygons, find_contours_corners, cut_out_objects
 from tests import binary_img_test, contour_test, contour_test2, grayscale_img_test2
 import numpy as np
+import cv2
 
 
 def test_find_contours():
@@ -47,3 +48,156 @@ def test_cut_out_object():
     cut_im = cut_out_object(grayscale_img_test2(), contour_test())
     assert np.shape(cut_out_object(
         grayscale_img_test2(), contour_test())[0])[0] == 29
+
+
+def test_packed_contours():
+    """Test packing contours keeps every contour and its points"""
+    contours = find_contours(binary_img_test())
+    packed = PackedContours(contours)
+    assert len(packed) == 366
+    assert np.array_equal(packed[10], contours[10])
+    assert len(packed.points) == sum(len(c) for c in contours)
+    x, y = packed.xy(0)
+    assert np.array_equal(x, contour_to_xy(contours[0])[0])
+
+
+def test_contours_props_matches_single_contour_functions():
+    """Test batch props agree with cv2 on every contour in an image"""
+    contours = find_contours(binary_img_test())
+    props = contours_props(contours)
+    assert len(props) == 366
+    for i in (0, 10, 200):
+        moments = cv2.moments(contours[i])
+        assert props['area'][i] == cv2.contourArea(contours[i])
+        assert np.isclose(props['perimeter'][i], cv2.arcLength(contours[i], True))
+        assert tuple(props[['x', 'y', 'w', 'h']][i]) == cv2.boundingRect(contours[i])
+        if moments['m00'] != 0:
+            assert np.isclose(props['cx'][i], moments['m10'] / moments['m00'])
+
+
+def test_contours_props_zero_area():
+    """Test a line contour gets area 0 and the mean of its points as centroid"""
+    line = np.array([[[0, 0]], [[4, 0]], [[8, 0]]], dtype=np.int32)
+    props = contours_props([line, contour_test()], rotated=False)
+    assert props['area'][0] == 0
+    assert props['cx'][0] == 4
+    assert props['area'][1] == 172.0
+    assert center_of_mass(line) == (4, 0)
+
+
+def test_contours_props_from_image():
+    """Test connected components option finds the same number of objects"""
+    bw_img = np.zeros((50, 50), dtype=np.uint8)
+    bw_img[5:10, 5:15] = 255
+    bw_img[30:40, 30:35] = 255
+    props = contours_props(bw_img=bw_img)
+    assert len(props) == 2
+    assert props['area'][0] == 50
+    assert props['w'][1] == 5
+
+
+def test_contour_areas():
+    """Test vectorised areas match cv2.contourArea"""
+    contours = find_contours(binary_img_test())
+    assert np.allclose(contour_areas(contours), [cv2.contourArea(c) for c in contours])
+
+
+def test_select_contours_top_k():
+    """Test top_k returns the largest contours, largest first"""
+    contours = find_contours(binary_img_test())
+    areas = contour_areas(contours)
+    selected, index = select_contours(contours, top_k=5, return_index=True)
+    assert np.array_equal(areas[index], np.sort(areas)[::-1][:5])
+    assert selected[0] is contours[index[0]]
+
+
+def test_find_contours_area_filter():
+    """Test find_contours filters by area before returning"""
+    contours = find_contours(binary_img_test(), min_area=100, max_area=1000)
+    areas = contour_areas(contours)
+    assert len(contours) > 0
+    assert np.all((areas >= 100) & (areas <= 1000))
+    assert len(find_contours(binary_img_test(), top_k=3)) == 3
+
+
+def test_select_contours_by_prop():
+    """Test selecting by perimeter"""
+    contours = [contour_test(), contour_test2()]
+    assert select_contours(contours, top_k=1, by='perimeter', smallest=True)[0] is contours[1]
+
+
+def _polygon_points(xc, yc, r, theta, n, per_side=20):
+    corners = polygon(xc, yc, r, theta, n)
+    t = np.linspace(0, 1, per_side, endpoint=False)[:, np.newaxis, np.newaxis]
+    return (corners + t * (np.roll(corners, -1, axis=0) - corners)).reshape(-1, 2)
+
+
+def test_polygon_dist_gradient():
+    """Test analytic gradient of polygon_dist matches a numerical one"""
+    from scipy.optimize import approx_fprime
+    points = _polygon_points(50, 40, 20, 0.2, 6) + 0.7
+    params = np.array([48.3, 41.1, 19.2, 0.13])
+    _, grad = polygon_dist(params, points, 6)
+    numerical = approx_fprime(params, lambda p: polygon_dist(p, points, 6)[0], 1e-6)
+    assert np.allclose(grad, numerical, atol=1e-3)
+
+
+def test_fit_polygons():
+    """Test fitting hexagons and a square to exact polygon outlines"""
+    contours = [_polygon_points(50, 40, 20, 0.2, 6), _polygon_points(120, 90, 30, 0.5, 6)]
+    corners, params = fit_polygons(contours, 6, return_params=True)
+    assert corners.shape == (2, 6, 2)
+    assert np.allclose(params[:, :2], [[50, 40], [120, 90]], atol=0.1)
+    assert np.allclose(params[:, 2], [20, 30], atol=0.1)
+    square = fit_polygon(_polygon_points(0, 0, 10, 0, 4), 4)
+    assert np.allclose(np.sort(np.abs(square).ravel()), np.sort(np.abs(polygon(0, 0, 10, 0, 4)).ravel()), atol=0.1)
+
+
+def test_find_contours_corners():
+    """Test batch corner finding returns the hexagon corners of each contour"""
+    contours = [np.round(_polygon_points(50, 40, 20, 0, 6)).astype(np.int32),
+                np.round(_polygon_points(150, 90, 30, 0, 6)).astype(np.int32)]
+    corners, centres = find_contours_corners(contours, 6)
+    assert corners.shape == (2, 6)
+    assert np.allclose(centres, [[50, 40], [150, 90]], atol=1)
+    for cnt, idx, truth in zip(contours, corners, (polygon(50, 40, 20, 0, 6), polygon(150, 90, 30, 0, 6))):
+        assert np.all(np.abs(np.sort(cnt[idx], axis=0) - np.sort(truth, axis=0)) <= 1)
+    points, _ = find_contours_corners(contours, 6, return_points=True)
+    assert np.array_equal(points[1], contours[1][corners[1]])
+
+
+def test_find_contours_corners_empty():
+    """Test a frame with no contours gives empty arrays"""
+    corners, centres = find_contours_corners([], 6)
+    assert corners.shape == (0, 6) and centres.shape == (0, 2)
+    points, _ = find_contours_corners([], 6, return_points=True)
+    assert points.shape == (0, 6, 2)
+
+
+def test_cut_out_objects():
+    """Test padded and ragged batch crops match cut_out_object"""
+    im = grayscale_img_test2()
+    corner = np.array([[[1, 1]], [[20, 1]], [[20, 15]], [[1, 15]]], dtype=np.int32)
+    far = corner + np.array([im.shape[1] - 22, im.shape[0] - 17], dtype=np.int32)
+    contours = [contour_test(), contour_test2(), corner, far]
+    crops, offsets, boxes = cut_out_objects(im, contours, ragged=True)
+    for i, cnt in enumerate(contours):
+        single, box = cut_out_object(im, cnt)
+        assert tuple(boxes[i]) == box
+        assert np.array_equal(crops[offsets[i]:offsets[i + 1]].reshape(box[3], box[2]), single)
+
+    stack, boxes = cut_out_objects(im, contours, size=(40, 50))
+    assert stack.shape == (4, 40, 50)
+    x, y = boxes[0, :2]
+    assert np.array_equal(stack[0, max(-y, 0):, max(-x, 0):], im[max(y, 0):y + 40, max(x, 0):x + 50])
+
+
+def test_cut_out_objects_mask():
+    """Test masked crops are fill outside the contour and padding off the image"""
+    im = np.full((50, 50), 200, dtype=np.uint8)
+    square = np.array([[[0, 0]], [[9, 0]], [[9, 9]], [[0, 9]]], dtype=np.int32)
+    crops, boxes = cut_out_objects(im, [square, square + 30], buffer=2, mask=True)
+    assert crops.shape == (2, 14, 14)
+    assert np.count_nonzero(crops[0]) == 100
+    assert np.count_nonzero(crops[1]) == 100
+    assert crops[0, 0, 0] == 0
@@ -0,0 +1,50 @@
+from labvision.images.cropmask import Mask, mask_circle, mask_rect, combine_mask, apply_mask
+from tests import rgb_img_test, grayscale_img_test
+import numpy as np
+
+
+def test_mask_bbox():
+    """Test Mask finds the bounding box of a rectangle"""
+    mask = Mask.rect((100, 200), ((10, 20), (50, 60)))
+    assert mask.bbox == ((10, 20), (51, 61))
+
+
+def test_mask_apply_matches_apply_mask():
+    """Test Mask.apply gives same result as apply_mask with a full mask"""
+    img = grayscale_img_test()
+    pts = ((300, 200), (300, 260))
+    expected = apply_mask(img, mask_circle(np.shape(img), pts))
+    mask = Mask.circle(np.shape(img), pts)
+    out = np.zeros_like(img)
+    assert np.array_equal(mask.apply(img, out=out), expected)
+    assert np.array_equal(mask.apply(img, out=out), expected)
+    assert np.array_equal(apply_mask(img, mask), expected)
+
+
+def test_mask_apply_only_writes_bbox():
+    """Test a reused out is only written inside the mask's bbox"""
+    img = grayscale_img_test()
+    mask = Mask.circle(np.shape(img), ((300, 200), (300, 260)))
+    (x1, y1), (x2, y2) = mask.bbox
+    out = mask.apply(img, out=np.full_like(img, 7))
+    assert np.all(out[:y1] == 7) and np.all(out[y2:] == 7)
+    assert np.array_equal(out[y1:y2, x1:x2], np.where(mask.region, img[y1:y2, x1:x2], 0))
+
+
+def test_mask_apply_colour_crop():
+    """Test cropped output of colour image is bbox sized"""
+    img = rgb_img_test()
+    mask = Mask.rect(np.shape(img), ((10, 20), (49, 59)))
+    out = mask.apply(img, crop=True)
+    assert np.shape(out) == (40, 40, 3)
+    assert np.array_equal(out, img[20:60, 10:50])
+
+
+def test_combine_masks():
+    """Test combining Mask objects matches combining arrays"""
+    shape = (100, 100)
+    m1, m2 = mask_rect(shape, ((5, 5), (20, 20))), mask_circle(shape, ((70, 70), (70, 80)))
+    combined = combine_mask(Mask(m1), Mask(m2))
+    assert np.array_equal(combined.to_array(), combine_mask(m1, m2))
+    restored = Mask.from_packed(combined.shape, combined.bbox, combined.packed)
+    assert np.array_equal(restored.to_array(), combined.to_array())
@@ -0,0 +1,51 @@
+from labvision.images.difference import absdiff, balanced_absdiff
+from labvision.images.transforms import absolute_diff
+from tests import grayscale_img_test, rgb_img_test
+import numpy as np
+import cv2
+
+
+def test_absdiff_scalar():
+    """Test scalar absdiff in place"""
+    img = grayscale_img_test()
+    expected = np.abs(img.astype(int) - 100).astype(np.uint8)
+    out = absdiff(img, 100, out=img)
+    assert out is img
+    assert np.array_equal(out, expected)
+
+
+def test_absdiff_stack_against_reference():
+    """Test every frame in a stack is compared with the reference"""
+    img = rgb_img_test()
+    stack = np.stack([img, img // 2])
+    out = absdiff(stack, img)
+    assert np.sum(out[0]) == 0
+    assert np.array_equal(out[1], img - img // 2)
+
+
+def test_absdiff_normalise_per_frame():
+    """Test each frame of a stack is stretched to 0-255"""
+    img = grayscale_img_test()
+    stack = np.stack([img // 4, img // 2])
+    out = absdiff(stack, 0, normalise=True)
+    assert out[0].max() == 255
+    assert out[1].max() == 255
+
+
+def _original_absolute_diff(img, value):
+    """absolute_diff as it was written before balanced_absdiff"""
+    subtract_frame = value * np.ones(np.shape(img), dtype=np.uint8)
+    frame1 = cv2.subtract(subtract_frame, img)
+    frame1 = cv2.normalize(frame1, frame1, 0, 255, cv2.NORM_MINMAX)
+    frame2 = cv2.subtract(img, subtract_frame)
+    frame2 = cv2.normalize(frame2, frame2, 0, 255, cv2.NORM_MINMAX)
+    return cv2.add(frame1, frame2)
+
+
+def test_balanced_absdiff_matches_original():
+    """Test balanced_absdiff and absolute_diff match the original calculation"""
+    for img in (grayscale_img_test(), rgb_img_test()):
+        for value in (0, 1, 100, 254, 255):
+            expected = _original_absolute_diff(img, value)
+            assert np.array_equal(balanced_absdiff(img, value), expected)
+            assert np.array_equal(absolute_diff(img, value), expected)
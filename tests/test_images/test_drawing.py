@@ -1,6 +1,7 @@
 
 from labvision.images.colours import WHITE
 from labvision.images.draw import draw_circle, draw_contours, draw_polygon, draw_delaunay_tess, draw_voronoi_cells
+from labvision.images.contours import PackedContours
 from tests import rgb_img_test, contour_test, contour_test2
 
 import numpy as np
@@ -59,4 +60,12 @@ def test_draw_contours():
     def test_draw_voronoi():
         needs implementing
     
-    """
\ No newline at end of file
+    """
+
+
+def test_draw_packed_contours():
+    """Test drawing packed contours gives same image as a list of contours"""
+    contours = [contour_test(), contour_test2()]
+    img = draw_contours(rgb_img_test(), contours)
+    packed_img = draw_contours(rgb_img_test(), PackedContours(contours))
+    assert np.array_equal(img, packed_img)
@@ -3,6 +3,8 @@ from labvision.images.feature_detection import find_circles, find_connected_comp
 from tests import binary_single_circle, grayscale_img_test2, rgb_img_test2
 from labvision.images.feature_detection import extract_nth_biggest_object
 import numpy as np
+import pytest
+import cv2
 
 def test_find_circles():
     """Test that find_circles finds 121 circles and one circle of radius 68.3"""
@@ -14,6 +16,29 @@ def test_find_circles():
     assert int(circles[0][2]) == int(68.3)
 
 
+def test_find_circles_tiled():
+    """Test tiled search finds the same circles without duplicates at tile boundaries"""
+    circles = find_circles(grayscale_img_test2(), 50, 70, 10, 40, 70)
+    tiled = find_circles(grayscale_img_test2(), 50, 70, 10, 40, 70, tiles=(2, 4), workers=4)
+    assert tiled.shape[1] == 3
+    dist = np.sqrt(((circles[:, np.newaxis, :2] - tiled[np.newaxis, :, :2]) ** 2).sum(axis=2))
+    assert np.sum(dist.min(axis=1) < 3) >= 0.95 * len(circles)
+    self_dist = np.sqrt(((tiled[:, np.newaxis, :2] - tiled[np.newaxis, :, :2]) ** 2).sum(axis=2))
+    assert np.all(self_dist[np.triu_indices(len(tiled), 1)] >= 50)
+
+
+def test_find_circles_tiled_seam():
+    """Test a circle centred on the seam between tiles is found whole"""
+    img = np.zeros((400, 400), dtype=np.uint8)
+    cv2.circle(img, (200, 200), 30, 255, -1)
+    img = cv2.GaussianBlur(img, (5, 5), 0)
+    circle = find_circles(img, 50, 70, 10, 10, 40)
+    tiled = find_circles(img, 50, 70, 10, 10, 40, tiles=2)
+    assert np.allclose(tiled, circle)
+    with pytest.raises(AssertionError):
+        find_circles(img, 50, 70, 10, 10, 0, tiles=2)
+
+
 def test_find_connected_components():
     """Test find connected components finds circle with centre at x=50 """
     labels, stats, centroids = find_connected_components(
@@ -0,0 +1,60 @@
+from labvision.images.feature_table import FeatureTable
+from labvision.images.feature_detection import find_circles, find_connected_components
+from labvision.images.contours import contour_props
+from tests import binary_single_circle, grayscale_img_test2, contour_test
+import numpy as np
+import pytest
+import os
+
+
+def test_feature_table_grows_in_chunks():
+    """Test appending more rows than chunk_size keeps all the data"""
+    table = FeatureTable({'x': np.float32}, chunk_size=4)
+    for frame in range(5):
+        table.append(frame, x=np.arange(3))
+    assert len(table) == 15
+    assert table['frame'][-1] == 4
+    assert table['x'][4] == 1
+
+
+def test_feature_table_rejects_unknown_column():
+    """Test an unknown column is rejected before the table is changed"""
+    table = FeatureTable({'x': np.float32}, chunk_size=4)
+    with pytest.raises(AssertionError):
+        table.append(0, x=np.arange(3), y=np.arange(3))
+    assert len(table) == 0
+
+
+def test_feature_table_add_circles():
+    """Test circles from find_circles are stored with frame index"""
+    table = FeatureTable.for_circles()
+    table.add_circles(2, find_circles(grayscale_img_test2(), 50, 70, 10, 40, 70))
+    table.add_circles(3, None)
+    assert len(table) == 121
+    assert np.all(table['frame'] == 2)
+
+
+def test_feature_table_add_contour_props():
+    """Test contour_props output is stored"""
+    table = FeatureTable.for_contours()
+    table.add_contour_props(0, [contour_props(contour_test())])
+    assert table['area'][0] == 172.0
+
+
+def test_feature_table_add_components():
+    """Test background component is skipped"""
+    table = FeatureTable.for_components()
+    table.add_components(0, *find_connected_components(binary_single_circle()))
+    assert len(table) == 1
+    assert int(table['cx'][0]) == 50
+
+
+def test_feature_table_save_load(tmp_path):
+    """Test a table survives a round trip to .npz"""
+    table = FeatureTable.for_circles()
+    table.append(7, x=[1, 2], y=[3, 4], r=[5, 6])
+    filename = os.path.join(tmp_path, 'table.npz')
+    table.save(filename)
+    loaded = FeatureTable.load(filename)
+    assert len(loaded) == 2
+    assert loaded.frame_rows(7)['r'][1] == 6
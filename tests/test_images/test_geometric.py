@@ -3,7 +3,7 @@ import numpy as np
 import cv2
 
 from labvision.images.basics import display
-from labvision.images.geometric import get_shape, resize, rotate, hstack, vstack, to_uint8
+from labvision.images.geometric import get_shape, resize, rotate, hstack, vstack, to_uint8, normalise_uint8, GeometricCorrector, ImagePyramid, Mosaic
 
 from tests import rgb_img_test, grayscale_img_test
 
@@ -25,6 +25,51 @@ def test_rotate():
     rot_img = rotate(rgb_img_test(), 90)
     assert np.sum(rot_img[:,10]) == 1218266
 
+def test_geometric_corrector_rotate():
+    """Check corrector rotation matches rotate to within rounding"""
+    img = grayscale_img_test()
+    corrector = GeometricCorrector(np.shape(img), angle=17)
+    out = corrector.apply(img)
+    assert np.shape(out) == np.shape(rotate(img, 17))
+    assert np.mean(np.abs(out.astype(int) - rotate(img, 17))) < 0.5
+
+def test_geometric_corrector_perspective_crop():
+    """Check perspective warp with crop matches warpPerspective then crop"""
+    img = rgb_img_test()
+    matrix = cv2.getPerspectiveTransform(np.float32([[0, 0], [100, 0], [100, 100], [0, 100]]),
+                                         np.float32([[10, 5], [110, 0], [105, 100], [0, 90]]))
+    corrector = GeometricCorrector(np.shape(img), perspective=matrix, cropbox=((50, 60), (300, 200)))
+    expected = cv2.warpPerspective(img, matrix, (np.shape(img)[1], np.shape(img)[0]))[60:200, 50:300]
+    out = corrector.apply(img)
+    assert np.shape(out) == (140, 250, 3)
+    assert np.mean(np.abs(out.astype(int) - expected)) < 0.5
+
+def test_geometric_corrector_undistort():
+    """Check undistortion matches cv2.undistort"""
+    img = grayscale_img_test()
+    h, w = np.shape(img)
+    camera_matrix = np.array([[800, 0, w / 2], [0, 800, h / 2], [0, 0, 1.0]])
+    dist_coeffs = np.array([-0.2, 0.05, 0, 0, 0])
+    corrector = GeometricCorrector(np.shape(img), camera_matrix=camera_matrix, dist_coeffs=dist_coeffs)
+    expected = cv2.undistort(img, camera_matrix, dist_coeffs)
+    assert np.mean(np.abs(corrector.apply(img).astype(int) - expected)) < 0.5
+
+def test_image_pyramid_cached():
+    """Check levels are built once and halve in size"""
+    img = grayscale_img_test()
+    pyramid = ImagePyramid(img)
+    assert pyramid[2] is pyramid[2]
+    assert len(pyramid) == 3
+    assert np.shape(pyramid[1])[1] == (np.shape(img)[1] + 1) // 2
+
+def test_image_pyramid_coords():
+    """Check coords map between levels and back"""
+    pyramid = ImagePyramid(rgb_img_test(), method='area', scale=0.25)
+    pts = np.array([[100.0, 40.0], [8.0, 16.0]])
+    coarse = pyramid.to_level(pts, 0, 1)
+    assert np.allclose(pyramid.to_level(coarse, 1, 0), pts)
+    assert coarse[0, 0] == pytest.approx(100.5 * pyramid.level_scale(1)[0] - 0.5)
+
 def test_hstack_colour():
     img = rgb_img_test()
     stacked_img = hstack(img,img)
@@ -60,6 +105,38 @@ def test_vstack_mixed():
     stacked_img = vstack(img1,img2)
     assert np.shape(stacked_img)[0] == 2*np.shape(img1)[0]
 
+def test_mosaic_matches_stack():
+    """Check a 2x2 mosaic of mixed depth images matches hstack and vstack"""
+    img1 = rgb_img_test()
+    img2 = grayscale_img_test()
+    mosaic = Mosaic((2, 2), np.shape(img1))
+    canvas = mosaic.update(img1, img2, img2, img1)
+    assert np.array_equal(canvas, vstack(hstack(img1, img2), hstack(img2, img1)))
+    mosaic[1, 1] = img2
+    assert canvas is mosaic.canvas
+    assert np.array_equal(mosaic.slot(3)[:, :, 2], img2)
+
 def test_convert_uint8():
     """Check to_uint8 converts array to uint8"""
-    assert to_uint8(rgb_img_test()).dtype == np.dtype('uint8')
\ No newline at end of file
+    assert to_uint8(rgb_img_test()).dtype == np.dtype('uint8')
+
+
+def test_normalise_uint8_float_stack():
+    """Check per frame and global scaling of a float32 stack"""
+    stack = np.stack([np.linspace(0, 1, 100, dtype=np.float32).reshape(10, 10),
+                      np.linspace(0, 10, 100, dtype=np.float32).reshape(10, 10)])
+    per_frame = normalise_uint8(stack, stack=True)
+    assert per_frame[0].max() == 255 and per_frame[1].max() == 255
+    out = np.zeros(np.shape(stack), dtype=np.uint8)
+    normalise_uint8(stack, out=out, stack=True, per_frame=False)
+    assert out[0].max() == 26
+    assert out[1].max() == 255
+
+def test_normalise_uint8_fixed_range_and_percentiles():
+    """Check values outside a fixed range are clipped and percentiles ignore outliers"""
+    img = np.array([[-5.0, 0.0, 25.0, 100.0, 500.0]])
+    assert list(normalise_uint8(img, vmin=0, vmax=100)[0]) == [0, 0, 64, 255, 255]
+    img = np.arange(1000, dtype=np.uint16).reshape(10, 100)
+    img[0, 0] = 60000
+    assert normalise_uint8(img)[5, 0] == 2
+    assert normalise_uint8(img, percentiles=(0, 99))[5, 0] == 129
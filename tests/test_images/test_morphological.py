@@ -1,6 +1,7 @@
 from tests import binary_single_circle
-from labvision.images.morphological import dilate, erode, closing, opening
+from labvision.images.morphological import dilate, erode, closing, opening, get_kernel, MorphChain, morph_chain
 import numpy as np
+import pytest
 from labvision.images.basics import display
 
 
@@ -17,15 +18,23 @@ def test_erode():
     img = erode(binary_single_circle(), kernel=(5, 5),
                 iterations=2)
     assert int(
-        (np.sum(binary_single_circle()[50, :]) - (np.sum(img[50, :])))/255) == 6
+        (np.sum(binary_single_circle()[50, :]) - (np.sum(img[50, :])))/255) == 10
+
+
+def test_erode_iterations_match_chain():
+    """Test erode applies every iteration, as MorphChain does"""
+    img = binary_single_circle()
+    chain = MorphChain([('erode', 3, 3)]).apply(img)
+    assert np.array_equal(erode(img, 3, iterations=3), chain)
+    assert not np.array_equal(erode(img, 3, iterations=3), erode(img, 3, iterations=1))
 
 
 def test_closing():
-    """Test closing by summing across circle after two closing operations"""
+    """Test closing by summing across circle after two closing operations. Closing a filled circle should leave it unchanged"""
     img = closing(binary_single_circle(), kernel=(5, 5),
                   iterations=2)
     assert int(
-        (np.sum(binary_single_circle()[50, :]) - (np.sum(img[50, :])))/255) == 2
+        (np.sum(binary_single_circle()[50, :]) - (np.sum(img[50, :])))/255) == 0
 
 
 def test_opening():
@@ -34,3 +43,28 @@ def test_opening():
                   iterations=2)
     assert int(
         (np.sum(binary_single_circle()[50, :]) - (np.sum(img[50, :])))/255) == 2
+
+
+def test_get_kernel_cached():
+    """Test kernels are built once and have (height, width) shape"""
+    assert get_kernel(5) is get_kernel((5, 5))
+    assert np.shape(get_kernel((3, 7))) == (7, 3)
+
+
+def test_morph_chain():
+    """Test a chain gives the same result as calling each operation in turn"""
+    img = binary_single_circle()
+    img[5:7, 5:7] = 255
+    expected = dilate(closing(opening(img, kernel=3), kernel=5), kernel=3, iterations=2)
+    chain = MorphChain([('open', 3), ('close', 5), ('dilate', 3, 2)])
+    out = np.zeros_like(img)
+    chain.apply(img, out=out)
+    assert np.array_equal(out, expected)
+    assert np.array_equal(morph_chain(img, [('open', 3), ('close', 5), ('dilate', 3, 2)]), expected)
+
+
+def test_morph_chain_out_dtype():
+    """Test out with the wrong dtype is rejected rather than ignored"""
+    img = binary_single_circle()
+    with pytest.raises(AssertionError):
+        MorphChain([('dilate', 3)]).apply(img, out=np.zeros(img.shape, dtype=np.int32))
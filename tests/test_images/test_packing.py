@@ -0,0 +1,50 @@
+from labvision.images.packing import PackedMask, RLELabels, SegmentationStore, rle_encode, rle_decode
+from labvision.images.feature_detection import find_connected_components
+from tests import binary_img_test, binary_single_circle
+import numpy as np
+import os
+
+
+def test_packed_mask_round_trip():
+    """Test packing and unpacking a binary image"""
+    bw_img = binary_img_test()
+    packed = PackedMask(bw_img)
+    assert np.array_equal(packed.to_array(), bw_img)
+    assert packed.count() == np.count_nonzero(bw_img)
+    assert packed.nbytes * 7 < bw_img.nbytes
+
+
+def test_packed_mask_boolean_ops():
+    """Test boolean ops agree with numpy. Shape chosen so bits need padding"""
+    a = np.random.default_rng(0).random((7, 9)) > 0.5
+    b = np.random.default_rng(1).random((7, 9)) > 0.5
+    pa, pb = PackedMask(a), PackedMask(b)
+    assert np.array_equal((pa & pb).to_array(1), a & b)
+    assert np.array_equal((pa | pb).to_array(1), a | b)
+    assert np.array_equal((pa ^ pb).to_array(1), a ^ b)
+    assert (~pa).count() == np.count_nonzero(~a)
+
+
+def test_rle_labels():
+    """Test run length encoding of a label image"""
+    labels, _, _ = find_connected_components(binary_single_circle())
+    rle = RLELabels(labels)
+    assert np.array_equal(rle.to_array(), labels)
+    assert rle.select(1).count() == np.count_nonzero(labels == 1)
+    values, lengths = rle_encode(np.array([3, 3, 1, 1, 1, 2]))
+    assert np.array_equal(values, [3, 1, 2])
+    assert np.array_equal(rle_decode((6,), values, lengths), [3, 3, 1, 1, 1, 2])
+
+
+def test_segmentation_store_save_load(tmp_path):
+    """Test a store of masks and a store of labels survive saving"""
+    filename = os.path.join(tmp_path, 'seg.npz')
+    for method, frame in (('packed', binary_img_test()),
+                          ('rle', find_connected_components(binary_single_circle())[0])):
+        store = SegmentationStore(method=method)
+        store.append(frame)
+        store.append(frame)
+        store.save(filename)
+        loaded = SegmentationStore.load(filename)
+        assert len(loaded) == 2
+        assert np.array_equal(loaded[1], frame)
@@ -0,0 +1,35 @@
+from labvision.images.sweep import sweep, expand_param_dict
+from labvision.images.thresholds import threshold
+from labvision.images.morphological import dilate
+from tests import grayscale_img_test
+import numpy as np
+
+
+def white_fraction_close_to_half(out, frame):
+    return -abs(np.mean(out > 0) - 0.5)
+
+
+def test_expand_param_dict():
+    """Test ConfigGui style lists are expanded and tuples used directly"""
+    values = expand_param_dict({'value': [100, 0, 20, 5], 'invert': (0, 1)})
+    assert values['value'] == [0, 5, 10, 15, 20]
+    assert values['invert'] == [0, 1]
+
+
+def test_sweep_threshold():
+    """Test sweep scores every combination and sorts best first"""
+    frames = [grayscale_img_test(), grayscale_img_test()[::2, ::2]]
+    table = sweep(threshold, {'value': [100, 0, 255, 51]}, frames,
+                  white_fraction_close_to_half, workers=2)
+    assert len(table) == 6
+    assert np.shape(table['frame_scores']) == (6, 2)
+    assert table['score'][0] == np.max(table['score'])
+
+
+def test_sweep_tuple_params():
+    """Test parameters with tuple values such as kernel sizes"""
+    frames = [threshold(grayscale_img_test(), 100)]
+    table = sweep(dilate, {'kernel': ((3, 3), (5, 5))}, frames,
+                  white_fraction_close_to_half, workers=1)
+    assert len(table) == 2
+    assert {tuple(kernel) for kernel in table['kernel']} == {(3, 3), (5, 5)}
@@ -1,6 +1,7 @@
 from tests import grayscale_img_test
-from labvision.images.thresholds import adaptive_threshold, threshold
+from labvision.images.thresholds import adaptive_threshold, threshold, threshold_stack, adaptive_threshold_stack
 import numpy as np
+import pytest
 
 
 
@@ -16,3 +17,32 @@ def test_adaptive_threshold():
 
 
 
+
+
+def test_threshold_stack():
+    """Check stack threshold matches threshold and fills out"""
+    img = grayscale_img_test()
+    stack = np.stack([img, 255 - img, img])
+    out = np.zeros_like(stack)
+    _, values = threshold_stack(stack, out=out, workers=2)
+    assert np.array_equal(out[0], threshold(img))
+    assert np.array_equal(out[1], threshold(255 - img))
+    assert len(values) == 3
+    _, values = threshold_stack(stack, 100)
+    assert np.all(values == 100)
+
+
+def test_adaptive_threshold_stack():
+    """Check stack adaptive threshold matches adaptive_threshold"""
+    img = grayscale_img_test()
+    out = adaptive_threshold_stack(np.stack([img, img]), 11, 5)
+    assert np.array_equal(out[1], adaptive_threshold(img, 11, 5))
+
+
+def test_threshold_stack_out_dtype():
+    """Check out with the wrong dtype is rejected rather than ignored"""
+    stack = np.stack([grayscale_img_test()] * 2)
+    with pytest.raises(AssertionError):
+        threshold_stack(stack, 100, out=np.zeros(stack.shape, dtype=np.float32))
+    with pytest.raises(AssertionError):
+        adaptive_threshold_stack(stack, 11, 5, out=np.zeros(stack.shape, dtype=np.float32))
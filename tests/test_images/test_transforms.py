@@ -1,5 +1,7 @@
 from tests import binary_single_circle, grayscale_img_test
-from labvision.images.transforms import brightness_contrast, distance, gamma
+from labvision.images.transforms import brightness_contrast, distance, gamma, gamma_lut, lut_pipeline, apply_lut
+from labvision.images.thresholds import threshold
+import numpy as np
 
 def test_gamma():
     img = gamma(grayscale_img_test(), gamma=2)
@@ -12,4 +14,18 @@ def test_brightness_contrast():
 def test_distance_transform():
     """Tests distance transform. Draws single binary circle cx,cy = 50,50 of radius 30 on blank image (100,100) and tests value of central pixel in circle which should be the rad in pixels."""
     img = distance(binary_single_circle(), normalise=False)
-    assert int(img[50, 50]) == 29
\ No newline at end of file
+    assert int(img[50, 50]) == 29
+
+
+def test_gamma_lut_cached():
+    """Tests gamma tables are only built once for each value"""
+    assert gamma_lut(2) is gamma_lut(2)
+
+def test_lut_pipeline():
+    """Tests a composed table gives the same result as applying each step"""
+    img = grayscale_img_test()
+    table = lut_pipeline([('gamma', {'gamma': 2}),
+                          ('brightness_contrast', {'brightness': 10, 'contrast': 1.5}),
+                          ('threshold', {'value': 100})])
+    expected = threshold(brightness_contrast(gamma(img, gamma=2), brightness=10, contrast=1.5), 100)
+    assert np.array_equal(apply_lut(img, table), expected)
@@ -5,6 +5,7 @@ import sys
 import shutil
 import pytest
 import numpy as np
+from labvision.custom_exceptions import ImageSequenceError
 
 sys.path.insert(0, os.path.abspath(
     os.path.join(os.path.dirname(__file__), '..')))
@@ -150,3 +151,160 @@ def test_either_img_framesize_supplied_error():
 def test_suffix_generator():
     """Test that suffix_generator creates the correct suffix"""
     assert video.suffix_generator(5, num_figs=4) == '0005'
+
+
+# =================================================================================
+# ResultCache Tests
+# =================================================================================
+
+
+_calls = []
+
+
+def _count_calls(img, step=2):
+    _calls.append(step)
+    return img[::step, ::step]
+
+
+def test_result_cache_reuses_stages(tmp_path):
+    """Test that changing a later stage's params does not recompute earlier stages"""
+    cache = video.ResultCache(str(tmp_path))
+    vid = video.ReadVideo(mp4_videopath)
+    _calls.clear()
+    stages = [(_count_calls, {'step': 2})]
+    cache.run(vid, 2, stages)
+    cache.run(vid, 2, stages)
+    assert len(_calls) == 1
+    out = cache.run(vid, 2, stages + [(_count_calls, {'step': 3})])
+    assert len(_calls) == 2
+    assert np.shape(out) == (180, 320, 3)
+
+
+def test_result_cache_evicts(tmp_path):
+    """Test that the cache stays below max_bytes"""
+    cache = video.ResultCache(str(tmp_path), max_bytes=25000)
+    for i in range(5):
+        cache.put(str(i), np.zeros(10000, dtype=np.uint8))
+    assert cache.total_bytes <= 25000
+    assert '4' in cache
+    assert cache.get('0') is None
+
+
+def _returns_none(img):
+    _calls.append(None)
+    return None
+
+
+def test_result_cache_return_function(tmp_path):
+    """Test that return_function is part of the video identity"""
+    cache = video.ResultCache(str(tmp_path))
+    plain = video.ReadVideo(mp4_videopath)
+    small = video.ReadVideo(mp4_videopath, return_function=_count_calls)
+    stages = [(_count_calls, {'step': 3})]
+    assert cache.key(plain, 2, stages) != cache.key(small, 2, stages)
+
+
+def test_result_cache_stores_none(tmp_path):
+    """Test that a stage returning None is cached rather than rerun"""
+    cache = video.ResultCache(str(tmp_path))
+    vid = video.ReadVideo(mp4_videopath)
+    _calls.clear()
+    stages = [(_returns_none, {})]
+    assert cache.run(vid, 2, stages) is None
+    assert cache.run(vid, 2, stages) is None
+    assert len(_calls) == 1
+
+
+def test_result_cache_truncated_file(tmp_path):
+    """Test a truncated result is treated as a miss and forgotten"""
+    cache = video.ResultCache(str(tmp_path))
+    cache.put('array', np.zeros(1000, dtype=np.uint8))
+    cache.put('object', {'a': list(range(1000))})
+    for filename in os.listdir(str(tmp_path)):
+        with open(os.path.join(str(tmp_path), filename), 'r+b') as f:
+            f.truncate(20)
+    cache = video.ResultCache(str(tmp_path))
+    assert cache.get('array') is None
+    assert cache.get('object') is None
+    assert len(cache) == 0
+
+
+# =================================================================================
+# Filter Tests
+# =================================================================================
+
+
+def test_temporal_filter_mean():
+    """Test running mean matches the mean of the last window frames"""
+    frames = [np.full((4, 6), i * 10, dtype=np.uint8) for i in range(6)]
+    out = list(video.TemporalFilter(frames, window=3, method='mean'))
+    assert out[0][0, 0] == 0
+    assert out[5][0, 0] == 40
+
+
+def test_temporal_filter_tiled_median():
+    """Test tiled median gives the same answer as a single tile"""
+    vid = video.ReadVideo(mp4_videopath, grayscale=True, frame_range=(0, 6, 1))
+    frames = [frame for frame in vid]
+    single = list(video.TemporalFilter(frames, window=5))
+    with video.TemporalFilter(frames, window=5, tiles=4) as tiled:
+        tiled = list(tiled)
+    assert np.array_equal(single[-1], tiled[-1])
+    assert np.array_equal(single[-1], np.median(frames[1:], axis=0).astype(np.uint8))
+
+
+def test_change_detector_skips_static_frames():
+    """Test repeated frames are skipped and changed frames kept"""
+    still = np.zeros((64, 64), dtype=np.uint8)
+    moved = still.copy()
+    moved[:32] = 255
+    detector = video.ChangeDetector([still, still, still, moved, moved], threshold=2)
+    kept = list(detector)
+    assert len(kept) == 2
+    assert detector.kept == [0, 3]
+    assert detector.stats['skipped'] == 3
+
+
+def test_change_detector_histogram():
+    """Test histogram method works on colour video frames"""
+    vid = video.ReadVideo(mp4_videopath, frame_range=(0, 4, 1))
+    detector = video.ChangeDetector(vid, threshold=0.5, method='histogram', return_index=True)
+    index, frame = next(iter(detector))
+    assert index == 0
+    assert np.shape(frame) == (1080, 1920, 3)
+
+
+# =================================================================================
+# WriteImgSeq Tests
+# =================================================================================
+
+
+def test_write_img_seq(tmp_path):
+    """Test frames are written to zero padded files in the background"""
+    stub = os.path.join(tmp_path, 'frame_')
+    img = rgb_img_test()
+    with video.WriteImgSeq(stub, ext='.png', frame=img, num_figs=3, max_queue=2, png_compression=1) as writeseq:
+        for i in range(4):
+            writeseq.add_frame(img)
+    assert os.path.exists(stub + '003.png')
+    assert video.ReadVideo(stub + '*.png').num_frames == 4
+
+
+def test_write_img_seq_wrong_shape():
+    """Test that adding a frame of the wrong shape raises error"""
+    writeseq = video.WriteImgSeq('frame_', frame_size=(10, 10, 3))
+    with pytest.raises(AssertionError):
+        writeseq.add_frame(np.zeros((5, 5, 3), dtype=np.uint8))
+    writeseq.close()
+
+
+def test_write_img_seq_reports_errors(tmp_path):
+    """Test failed writes are reported per frame with ImageSequenceError"""
+    stub = os.path.join(tmp_path, 'missing_dir', 'frame_')
+    writeseq = video.WriteImgSeq(stub, start=3)
+    for i in range(2):
+        writeseq.add_frame(np.zeros((5, 5, 3), dtype=np.uint8))
+    with pytest.raises(ImageSequenceError) as e:
+        writeseq.close()
+    assert [error[0] for error in e.value.errors] == [3, 4]
+    assert e.value.errors[0][1] == stub + '00003.png'